@@ -0,0 +1,177 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pitch_lake_reference import Round, Vault
+
+# What-if queries on a round's auction: the clearing price and options sold that settle_auction would produce
+# if one bid were removed, or if the reserve price or the number of options for sale changed.
+#
+# settle_auction clears at the highest bid price p where the whole options demanded,
+#   units(p) = sum(min(size // p, options for sale)) over bids priced at or above p,
+# cover the options for sale. The min() never changes the outcome (a single capped bid covers the supply
+# on its own), so units(p) is summed uncapped here. It never decreases as p falls, so the clearing level is
+# found by binary search over the distinct bid prices.
+#
+# The demand curve keeps, per price level, the running sum of bid sizes in wei. Since
+#   size_sum(p) / p - bid_count(p) < units(p) <= size_sum(p) / p,
+# most levels are decided from the prefix sums in O(1). Exact whole-option demand is only summed at levels
+# within one option per bid of the supply, and is then cached, so a table of queries over every bid
+# evaluates a handful of levels once and answers each query in O(log n).
+
+_RELATIVE_MARGIN = 1e-12  # float slack when deciding a level from the prefix sums
+
+
+class AuctionOutcome:
+    def __init__(self, clearing_price, options_sold):
+        self.clearing_price = clearing_price  # in wei, 0 if no bid is valid
+        self.options_sold = options_sold
+
+    def __eq__(self, other):
+        return isinstance(other, AuctionOutcome) and (self.clearing_price, self.options_sold) == (other.clearing_price, other.options_sold)
+
+    def __repr__(self):
+        return f"AuctionOutcome(clearing_price={self.clearing_price}, options_sold={self.options_sold})"
+
+
+def _as_array(values: List):
+    """
+    int64 when every value fits, so size // price stays exact; float64 when the model already carries floats.
+    """
+    if all(isinstance(value, int) for value in values):
+        if all(-2**63 <= value < 2**63 for value in values):
+            return np.array(values, dtype=np.int64)
+        return np.array(values, dtype=object)
+    return np.array(values, dtype=np.float64)
+
+
+class DemandCurve:
+    """
+    Cumulative demand over a round's bids, built once and queried many times.
+
+    Bids below the round's reserve price are kept, so a lower reserve price can be queried as well.
+    """
+
+    def __init__(self, bids: List[Dict], total_options_forsale, reserve_price):
+        self.total_options_forsale = total_options_forsale
+        self.reserve_price = reserve_price
+
+        order = sorted(range(len(bids)), key=lambda index: -bids[index]['price'])
+        sizes = [bids[index]['size'] for index in order]
+        self._sizes = _as_array(sizes)
+
+        self.level_prices: List = []  # distinct bid prices, highest first
+        self._level_ends: List[int] = []  # bids priced at or above each level
+        # bid_id -> (level, size). Bids without an ID are keyed by their position in `bids`.
+        self._bids: Dict[int, Tuple[int, object]] = {}
+        level_prices = self.level_prices
+        level_ends = self._level_ends
+        for position, index in enumerate(order):
+            bid = bids[index]
+            if not level_prices or bid['price'] != level_prices[-1]:
+                level_prices.append(bid['price'])
+                level_ends.append(position + 1)
+            else:
+                level_ends[-1] = position + 1
+            self._bids[bid.get('bid_id', index)] = (len(level_prices) - 1, bid['size'])
+        size_sums = list(accumulate(sizes))
+        self._level_size_sums = [size_sums[end - 1] for end in level_ends]
+        self._negated_prices = [-price for price in level_prices]  # ascending, for bisect
+        self._units: Dict[int, object] = {}  # level -> exact whole-option demand, filled on demand
+
+    @classmethod
+    def from_round(cls, round: Round) -> "DemandCurve":
+        return cls(round.bids, round.total_options_forsale, round.reserve_price)
+
+    def _level_count(self, level: int) -> int:
+        return self._level_ends[level] - (self._level_ends[level - 1] if level else 0)
+
+    def units_at_level(self, level: int):
+        """
+        Exact whole options demanded at a level's price, by every bid priced at or above it.
+        """
+        units = self._units.get(level)
+        if units is None:
+            price = self.level_prices[level]
+            # int(): an object array (sizes of 2**63 wei or more) sums to a Python int, which has no .item().
+            units = self._units[level] = int(np.floor_divide(self._sizes[:self._level_ends[level]], price).sum())
+        return units
+
+    def _units_without(self, level: int, excluded):
+        units = self.units_at_level(level)
+        if excluded is not None and excluded[0] <= level:
+            units -= excluded[1] // self.level_prices[level]
+        return units
+
+    def _covers(self, level: int, total_options, excluded) -> bool:
+        price = self.level_prices[level]
+        size_sum = self._level_size_sums[level]
+        count = self._level_ends[level]
+        if excluded is not None and excluded[0] <= level:
+            size_sum -= excluded[1]
+            count -= 1
+        upper_bound = size_sum / price
+        if upper_bound * (1 + _RELATIVE_MARGIN) < total_options:
+            return False
+        if upper_bound * (1 - _RELATIVE_MARGIN) - count >= total_options:
+            return True
+        return self._units_without(level, excluded) >= total_options
+
+    def outcome(self, total_options_forsale=None, reserve_price=None, without_bid: Optional[int] = None) -> AuctionOutcome:
+        """
+        The auction's outcome under the given changes; arguments left as None keep the round's values.
+
+        :param without_bid: ID of a bid to leave out.
+        """
+        total_options = self.total_options_forsale if total_options_forsale is None else total_options_forsale
+        reserve = self.reserve_price if reserve_price is None else reserve_price
+        excluded = None
+        if without_bid is not None:
+            if without_bid not in self._bids:
+                raise ValueError(f"Unknown bid {without_bid}.")
+            excluded = self._bids[without_bid]
+        # The excluded bid's level disappears if no other bid shares its price.
+        removed_level = excluded[0] if excluded is not None and self._level_count(excluded[0]) == 1 else None
+
+        valid_levels = bisect_right(self._negated_prices, -reserve)  # levels priced at or above the reserve
+        low, high = 0, valid_levels
+        while low < high:
+            middle = (low + high) // 2
+            if self._covers(middle, total_options, excluded):
+                high = middle
+            else:
+                low = middle + 1
+        if low == removed_level:
+            low += 1  # demand only grows as the price falls, so the next level down covers as well
+        if low < valid_levels:
+            return AuctionOutcome(self.level_prices[low], total_options)
+
+        # No level covers the supply: settle_auction falls back to the lowest valid bid price.
+        lowest = valid_levels - 1
+        if lowest == removed_level:
+            lowest -= 1
+        if lowest < 0:
+            return AuctionOutcome(0, 0)
+        return AuctionOutcome(self.level_prices[lowest], min(total_options, self._units_without(lowest, excluded)))
+
+    def bid_removal_table(self) -> List[Tuple[int, AuctionOutcome]]:
+        """
+        (bid ID, outcome without that bid) for every bid, in bid ID order.
+        """
+        return [(bid_id, self.outcome(without_bid=bid_id)) for bid_id in sorted(self._bids)]
+
+    def reserve_price_table(self, reserve_prices: Iterable) -> List[Tuple[object, AuctionOutcome]]:
+        return [(reserve_price, self.outcome(reserve_price=reserve_price)) for reserve_price in reserve_prices]
+
+    def total_options_table(self, totals: Iterable) -> List[Tuple[object, AuctionOutcome]]:
+        return [(total, self.outcome(total_options_forsale=total)) for total in totals]
+
+
+def demand_curve(vault: Vault, option_round_id: Optional[int] = None) -> DemandCurve:
+    """
+    Demand curve of a round's bids, the current round by default.
+    """
+    round = vault.fetch_current_round() if option_round_id is None else vault.rounds[option_round_id]
+    return DemandCurve.from_round(round)
@@ -0,0 +1,21 @@
+import contextlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def quiet_vault():
+    # The reference model prints on every operation; keep that out of the timings.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    # Keep saved runs, baseline.json included, to summary stats: the raw timings add tens of MB and
+    # --benchmark-compare only reads the stats.
+    for benchmark in output_json["benchmarks"]:
+        benchmark["stats"].pop("data", None)
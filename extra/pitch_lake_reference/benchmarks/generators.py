@@ -0,0 +1,93 @@
+import random
+from typing import List, Tuple
+
+from pitch_lake_reference import SECONDS_PER_DAY, Blockchain, MarketAggregator, OutOfTheMoneyStrategy, Vault, VaultConfig
+
+# Market inputs shared by every scenario: strike 16 gwei, cap 32 gwei, so one option
+# carries at most 16 ETH of payout and 10**6 ETH of collateral backs 62,500 options.
+PREV_MONTH_STD_DEV = 4 * 10**9
+PREV_MONTH_AVG_BASEFEE = 20 * 10**9
+SETTLEMENT_BASEFEE = 24 * 10**9
+DEFAULT_COLLATERAL = 10**6 * 10**18
+
+Bid = Tuple[str, int, int]  # (bidder, size in wei, price per option in wei)
+
+
+def make_vault(collateral: int = DEFAULT_COLLATERAL, num_lps: int = 1, config: VaultConfig = None) -> Vault:
+    """
+    Build a fresh vault with `collateral` split evenly across `num_lps` positions in round 0.
+    """
+    market_aggregator = MarketAggregator()
+    market_aggregator.set_prev_month_std_dev(PREV_MONTH_STD_DEV)
+    market_aggregator.set_prev_month_avg_basefee(PREV_MONTH_AVG_BASEFEE)
+    market_aggregator.set_current_month_avg_basefee(SETTLEMENT_BASEFEE)
+    blockchain = Blockchain()
+    vault = Vault(OutOfTheMoneyStrategy(market_aggregator), blockchain, market_aggregator, config)
+    for i in range(num_lps):
+        blockchain.set_current_sender(f"lp{i}")
+        vault.open_liquidity_position(collateral // num_lps)
+    return vault
+
+
+def generate_bids(seed: int, count: int, total_options: int) -> List[Bid]:
+    """
+    Deterministic bids whose combined demand is roughly twice `total_options`, priced 1-20 ETH.
+    """
+    rng = random.Random(seed)
+    mean_units = max(1, 2 * total_options // max(count, 1))
+    bids = []
+    for i in range(count):
+        price = rng.randint(1, 20) * 10**18
+        units = rng.randint(1, 2 * mean_units)
+        bids.append((f"bidder{i}", units * price, price))
+    return bids
+
+
+def open_auction(vault: Vault):
+    """
+    Start the next round once the settlement interval allows it, and move the chain clock inside its auction window.
+    """
+    vault.advance_to_next_event()
+    round_id, params = vault.start_new_option_round()
+    vault.blockchain.set_current_time(params.auction_end_time - SECONDS_PER_DAY)
+    return round_id, params
+
+
+def place_bids(vault: Vault, bids: List[Bid]):
+    blockchain = vault.blockchain
+    for bidder, size, price in bids:
+        blockchain.set_current_sender(bidder)
+        vault.auction_place_bid(size, price)
+
+
+def end_auction(vault: Vault):
+    round = vault.fetch_current_round()
+    vault.blockchain.set_current_time(round.auction_end_time + SECONDS_PER_DAY)
+
+
+def expire_options(vault: Vault):
+    round = vault.fetch_current_round()
+    vault.blockchain.set_current_time(round.option_settlement_time)
+
+
+def run_round(vault: Vault, bids: List[Bid]):
+    """
+    Run one full round: open, bid, settle the auction and settle the options.
+    """
+    open_auction(vault)
+    place_bids(vault, bids)
+    end_auction(vault)
+    vault.settle_auction()
+    expire_options(vault)
+    vault.settle_option_round()
+
+
+def aged_vault(num_rounds: int, seed: int, bids_per_round: int = 20) -> Vault:
+    """
+    A vault whose round 0 position has been rolled through `num_rounds` settled rounds.
+    """
+    vault = make_vault()
+    for r in range(num_rounds):
+        total_options = int(vault.fetch_next_round().total_collateral_at_initialization // (16 * 10**18))
+        run_round(vault, generate_bids(seed + r, bids_per_round, total_options))
+    return vault
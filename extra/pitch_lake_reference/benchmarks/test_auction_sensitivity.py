@@ -0,0 +1,67 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from auction_sensitivity import AuctionOutcome, DemandCurve
+from generators import make_vault
+
+# DemandCurve against a full re-run of the vault's own clearing and distribution, over randomized bids.
+
+PRICES = [100, 120, 150, 200, 210, 300, 333, 500]
+
+
+@pytest.fixture(scope="module")
+def vault():
+    return make_vault(collateral=10**22)
+
+
+def settle(vault, bids, total_options_forsale, reserve_price) -> AuctionOutcome:
+    round = SimpleNamespace(bids=bids, reserve_price=reserve_price, total_options_forsale=total_options_forsale,
+                            round_id=0, auction_clearing_price=None)
+    clearing_price = vault._calculate_clearing_price(round)
+    if clearing_price == 0:
+        return AuctionOutcome(0, 0)
+    round.auction_clearing_price = clearing_price
+    round.bids = [bid for bid in bids if bid['price'] >= reserve_price]
+    vault._distribute_options_based_on_clearing_price(round)
+    return AuctionOutcome(clearing_price, round.total_options_sold)
+
+
+def check_all_queries(vault, bids, total_options_forsale, reserve_price):
+    curve = DemandCurve(bids, total_options_forsale, reserve_price)
+    assert curve.outcome() == settle(vault, bids, total_options_forsale, reserve_price)
+    for bid in bids:
+        others = [other for other in bids if other is not bid]
+        assert curve.outcome(without_bid=bid['bid_id']) == settle(vault, others, total_options_forsale, reserve_price)
+    for other_reserve in sorted({0, reserve_price // 2, reserve_price * 2} | {bid['price'] for bid in bids}):
+        assert curve.outcome(reserve_price=other_reserve) == settle(vault, bids, total_options_forsale, other_reserve)
+    for other_supply in (0, 1, total_options_forsale // 3, total_options_forsale * 10):
+        assert curve.outcome(total_options_forsale=other_supply) == settle(vault, bids, other_supply, reserve_price)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_outcomes_match_settlement(vault, seed):
+    rng = random.Random(seed)
+    bids = []
+    for bid_id in range(rng.randint(1, 25)):
+        price = rng.choice(PRICES)
+        bids.append({'bid_id': bid_id, 'bidder_id': f"bidder{bid_id % 4}", 'price': price,
+                     'size': rng.randint(0, 3000) * rng.choice([1, price])})
+    check_all_queries(vault, bids, rng.choice([0, 1, 5, 10, 50, 100, 500]), rng.choice([0, 100, 150, 300]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_wei_scale_sizes(vault, seed):
+    # Sizes of 2**63 wei and more no longer fit int64, so the curve falls back to exact Python ints.
+    rng = random.Random(seed)
+    bids = []
+    for bid_id in range(rng.randint(2, 12)):
+        price = rng.randint(1, 20) * 10**18 + rng.randint(0, 10**9)
+        bids.append({'bid_id': bid_id, 'bidder_id': f"bidder{bid_id}", 'price': price,
+                     'size': rng.randint(1, 100) * price + rng.randint(0, price - 1)})
+    bids[0]['size'] = max(bids[0]['size'], 2**63)
+    curve = DemandCurve(bids, 100, 10**18)
+    level = len(curve.level_prices) - 1
+    assert curve.units_at_level(level) == sum(bid['size'] // curve.level_prices[level] for bid in bids)
+    check_all_queries(vault, bids, rng.randint(1, 300), 10**18)
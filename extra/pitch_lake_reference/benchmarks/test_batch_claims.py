@@ -0,0 +1,59 @@
+from generators import end_auction, expire_options, generate_bids, make_vault, open_auction, place_bids
+from pitch_lake_reference import ClaimStatus
+
+BIDS = generate_bids(11, 20, 62500)
+
+
+def entries(results):
+    return [(entry.round_id, entry.recipient, entry.amount, entry.status) for entry in results]
+
+
+def auction_vault():
+    vault = make_vault()
+    open_auction(vault)
+    place_bids(vault, BIDS)
+    return vault
+
+
+def test_batch_refunds_succeed_per_entry_and_report_failures():
+    vault = auction_vault()
+    assert entries(vault.batch_refund_unused_bid_deposits({0: None, 7: ["bidder0"]})) == [
+        (0, None, 0, ClaimStatus.ROUND_NOT_SETTLED),
+        (7, "bidder0", 0, ClaimStatus.INVALID_ROUND),
+    ]
+
+    end_auction(vault)
+    vault.settle_auction()
+    refunds = {bidder: vault.unused_bid_deposit_balance_of(0, bidder) for bidder in vault.fetch_current_round().refunds}
+    assert "bidder3" in refunds and all(refunds.values())
+    assert entries(vault.batch_refund_unused_bid_deposits({0: ["bidder3", "nobody"]})) == [
+        (0, "bidder3", refunds["bidder3"], ClaimStatus.OK),
+        (0, "nobody", 0, ClaimStatus.NO_ENTRY),
+    ]
+
+    # The rest of the round in one pass; bidder3 was already refunded.
+    refunds["bidder3"] = 0
+    assert entries(vault.batch_refund_unused_bid_deposits({0: None})) == [(0, bidder, amount, ClaimStatus.OK) for bidder, amount in refunds.items()]
+    assert all(entry.amount == 0 for entry in vault.batch_refund_unused_bid_deposits({0: None}))
+
+
+def test_batch_payouts_succeed_per_entry_and_report_failures():
+    vault = auction_vault()
+    end_auction(vault)
+    vault.settle_auction()
+    assert entries(vault.batch_claim_option_payouts({0: ["bidder0"]})) == [(0, "bidder0", 0, ClaimStatus.ROUND_NOT_SETTLED)]
+
+    expire_options(vault)
+    vault.settle_option_round()
+    buyers = list(vault.fetch_current_round().option_allocations)
+    payouts = {buyer: vault.payout_balance_of(0, buyer) for buyer in buyers}
+    assert all(payouts.values())
+    first, rest = buyers[0], buyers[1:]
+    assert entries(vault.batch_claim_option_payouts({0: [first, "nobody"], 3: None})) == [
+        (0, first, payouts[first], ClaimStatus.OK),
+        (0, "nobody", 0, ClaimStatus.NO_ENTRY),
+        (3, None, 0, ClaimStatus.INVALID_ROUND),
+    ]
+    assert entries(vault.batch_claim_option_payouts({0: rest})) == [(0, buyer, payouts[buyer], ClaimStatus.OK) for buyer in rest]
+    assert all(entry.amount == 0 for entry in vault.batch_claim_option_payouts({0: None}))
+    assert vault.claim_option_payout(0, first) == 0
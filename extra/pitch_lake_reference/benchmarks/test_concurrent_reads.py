@@ -0,0 +1,53 @@
+from concurrent_reads import VaultSeqLock
+from generators import end_auction, expire_options, generate_bids, make_vault, open_auction, place_bids
+from pitch_lake_reference import RoundState
+
+
+def test_view_keeps_pre_settlement_state_without_copying_bids():
+    vault = make_vault(num_lps=3)
+    open_auction(vault)
+    place_bids(vault, generate_bids(5, 200, 62500))
+    lock = VaultSeqLock(vault)
+
+    auction_view = lock._publish_view()
+    assert auction_view.rounds[0].bids is vault.rounds[0].bids
+    end_auction(vault)
+    vault.settle_auction()
+    assert auction_view.rounds[0].state == RoundState.AUCTION_STARTED and not auction_view.rounds[0].option_allocations
+
+    balances = [vault.collateral_balance_of(lp_id) for lp_id in range(3)]
+    total = vault.total_collateral()
+    settlement_view = lock._publish_view()
+    expire_options(vault)
+    vault.settle_option_round()
+    assert [settlement_view.collateral_balance_of(lp_id) for lp_id in range(3)] == balances
+    assert settlement_view.total_collateral() == total
+    assert vault.total_collateral() != total
+
+
+def test_reads_during_a_long_write_come_from_its_view():
+    vault = make_vault(num_lps=2)
+    open_auction(vault)
+    place_bids(vault, generate_bids(6, 50, 62500))
+    end_auction(vault)
+    settle_auction = vault.settle_auction
+    seen = []
+
+    def settle_while_reading():
+        # Runs inside the write section, where a reader thread would find the write in progress.
+        seen.append(lock.read(vault.fetch_current_round))
+        seen.append(lock.snapshot(lp_ids=[0, 1]))
+        return settle_auction()
+
+    vault.settle_auction = settle_while_reading
+    lock = VaultSeqLock(vault)
+    lock.enable()
+    vault.settle_auction()
+    lock.disable()
+
+    (round, version), snapshot = seen
+    assert version == 0 and round.state == RoundState.AUCTION_STARTED
+    assert snapshot.version == 0 and snapshot.round_state == RoundState.AUCTION_STARTED
+    assert snapshot.collateral_balances == {0: vault.collateral_balance_of(0), 1: vault.collateral_balance_of(1)}
+    assert lock.view_reads == 2
+    assert vault.fetch_current_round().state == RoundState.AUCTION_SETTLED
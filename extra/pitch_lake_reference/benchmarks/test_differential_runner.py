@@ -0,0 +1,15 @@
+import os
+
+from differential_runner import DEFAULT_SCENARIO_PATHS, SIMULATION_DATA_DIR, run_differential
+
+
+def test_shipped_recordings_have_no_unexplained_mismatches():
+    report = run_differential(DEFAULT_SCENARIO_PATHS, workers=1)
+    assert report.ok, report.summary()
+
+
+def test_current_format_recording_matches_without_divergences():
+    path = os.path.join(SIMULATION_DATA_DIR, "simulationOutput", "simulationOutputExample.json")
+    (result,) = run_differential([path], workers=1).results
+    assert result.ok and not result.explained
+    assert result.rounds_checked > 0
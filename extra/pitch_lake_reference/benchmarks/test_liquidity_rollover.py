@@ -0,0 +1,63 @@
+from generators import end_auction, expire_options, make_vault, open_auction, place_bids
+
+# Settled rounds roll each position's remaining collateral and premiums forward in whole wei.
+
+
+def settle_round(vault, bids, settlement_basefee):
+    open_auction(vault)
+    place_bids(vault, bids)
+    end_auction(vault)
+    vault.settle_auction()
+    expire_options(vault)
+    vault.market_aggregator.set_current_month_avg_basefee(settlement_basefee)
+    vault.settle_option_round()
+
+
+def rolled_matches_next_round(vault):
+    next_round = vault.fetch_next_round()
+    return vault.total_collateral() + vault.total_unallocated_liquidity() == next_round.total_collateral_at_initialization
+
+
+def test_balances_stay_exact_without_payout():
+    vault = make_vault(collateral=10**24 + 12345)
+    settle_round(vault, [("bidder", 10 * 10**18 + 3, 10**18 + 1)], settlement_basefee=10 * 10**9)
+
+    current_round = vault.fetch_current_round()
+    assert current_round.total_payout == 0
+    balance = vault.collateral_balance_of(0)
+    assert isinstance(balance, int)
+    assert balance == 10**24 + 12345 + int(current_round.total_premiums_collected)
+    assert vault.premium_balance_of(0) == int(current_round.total_premiums_collected)
+    assert vault.total_collateral() == vault.fetch_next_round().total_collateral_at_initialization
+
+    assert vault.withdraw_liquidity(0, balance)
+    assert vault.collateral_balance_of(0) == 0
+    assert vault.fetch_next_round().total_collateral_at_initialization == 0
+
+
+def test_lps_withdraw_principal_and_premiums_after_a_payout():
+    deposits = [3 * 10**23 + 1, 10**23 + 7, 2 * 10**23 + 5]
+    vault = make_vault(collateral=sum(deposits), num_lps=0)
+    for i, amount in enumerate(deposits):
+        vault.blockchain.set_current_sender(f"lp{i}")
+        vault.open_liquidity_position(amount)
+    bids = [("bidder0", 5000 * 10**18 + 11, 10**18), ("bidder1", 3000 * 10**18 + 5, 3 * 10**18 // 2)]
+    settle_round(vault, bids, settlement_basefee=24 * 10**9)
+
+    current_round = vault.fetch_current_round()
+    assert current_round.total_options_sold > 0 and current_round.total_payout > 0
+    balances = [vault.collateral_balance_of(position_id) for position_id in range(len(deposits))]
+    premiums = [vault.premium_balance_of(position_id) for position_id in range(len(deposits))]
+    assert sum(premiums) == int(current_round.total_premiums_collected)
+    assert sum(balances) == int(current_round.total_collateral_at_settlement) + int(current_round.total_premiums_collected)
+    assert rolled_matches_next_round(vault)
+    for deposit, balance, premium in zip(deposits, balances, premiums):
+        # Each LP's share of the round, less its share of the payout, plus its share of the premiums.
+        share = deposit / sum(deposits)
+        assert abs(balance - (deposit - share * current_round.total_payout + premium)) <= 1e-9 * deposit
+
+    for position_id, balance in enumerate(balances):
+        assert vault.withdraw_liquidity(position_id, balance)
+        assert rolled_matches_next_round(vault)
+    assert vault.total_collateral() == 0
+    assert vault.fetch_next_round().total_collateral_at_initialization == 0
@@ -0,0 +1,25 @@
+import pytest
+
+from generators import make_vault
+from load_generator import ActionType, LoadDriver
+
+START = (ActionType.START_ROUND, "", 0, 0, 0)
+SETTLE = (ActionType.SETTLE_ROUND, "", 0, 0, 0)
+
+
+def test_rejected_transitions_are_counted_not_raised():
+    vault = make_vault(num_lps=0)
+    driver = LoadDriver(vault)
+    # Below the minimum collateral, so the round cannot start, and nothing can be bid on or settled.
+    report = driver.apply([(ActionType.OPEN_POSITION, "lp", 0, 10**17, 0), START, (ActionType.PLACE_BID, "bidder", 0, 10**18, 10**18), SETTLE])
+    assert report.rejected == {ActionType.START_ROUND: 1, ActionType.PLACE_BID: 1, ActionType.SETTLE_ROUND: 1}
+
+    driver.apply([(ActionType.DEPOSIT, "lp", 0, 10**18, 0), START, SETTLE])
+    assert report.counts[ActionType.START_ROUND] == 2 and report.rejected[ActionType.START_ROUND] == 1
+    assert report.rejected[ActionType.SETTLE_ROUND] == 1
+
+
+def test_errors_other_than_rejections_propagate():
+    driver = LoadDriver(make_vault())
+    with pytest.raises(TypeError):
+        driver.apply([(ActionType.OPEN_POSITION, "lp", 0, 10**18, 0), (ActionType.DEPOSIT, "lp", 0, None, 0)])
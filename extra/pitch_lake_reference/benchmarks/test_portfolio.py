@@ -0,0 +1,22 @@
+from generators import PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, SETTLEMENT_BASEFEE
+from pitch_lake_reference import GENESIS_TIME, OutOfTheMoneyStrategy, RoundState
+from portfolio import MarketTimeline, MarketWindow, PortfolioEngine
+
+
+def test_round_settles_every_vault_when_one_auction_gets_no_bids():
+    window = MarketWindow(PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, SETTLEMENT_BASEFEE)
+    engine = PortfolioEngine(MarketTimeline([window, window]), GENESIS_TIME)
+    for name in ("bid", "empty"):
+        engine.add_vault(name, OutOfTheMoneyStrategy, [("lp", 10**6 * 10**18)])
+
+    def bid_provider(name, vault, round_id):
+        if name == "bid":
+            vault.blockchain.set_current_sender("bidder")
+            vault.auction_place_bid(100 * 10**18, 10**18)
+
+    for report in engine.run(bid_provider):
+        assert report.vaults["bid"].options_sold == 100
+        assert report.vaults["empty"].options_sold == 0 and report.vaults["empty"].total_payout == 0
+    assert len(engine.reports) == 2
+    for vault in engine.vaults.values():
+        assert vault.fetch_current_round().state == RoundState.OPTION_SETTLED
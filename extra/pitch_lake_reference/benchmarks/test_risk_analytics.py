@@ -0,0 +1,44 @@
+import pytest
+
+from pitch_lake_reference import OutOfTheMoneyStrategy, Vault
+from portfolio import PortfolioBlockchain, PortfolioMarketFeed
+from risk_analytics import analyze_current_round, analyze_next_round
+
+SCENARIOS = 20000
+
+
+@pytest.fixture
+def vault():
+    # Only the previous month is published; the current month's average is unknown while a round runs.
+    market_feed = PortfolioMarketFeed()
+    market_feed.set_prev_month_avg_basefee(20 * 10**9)
+    market_feed.set_prev_month_std_dev(4 * 10**9)
+    blockchain = PortfolioBlockchain()
+    vault = Vault(OutOfTheMoneyStrategy(market_feed), blockchain, market_feed)
+    blockchain.set_current_sender("lp")
+    vault.open_liquidity_position(10**6 * 10**18)
+    return vault
+
+
+def test_current_round_right_after_start_matches_next_round_analysis(vault):
+    before_start = analyze_next_round(vault, SCENARIOS, seed=7)
+    vault.start_new_option_round()
+    started = analyze_current_round(vault, SCENARIOS, seed=7)
+
+    assert started.options_sold == before_start.options_sold
+    assert started.total_collateral == before_start.total_collateral
+    assert started.expected_payout == before_start.expected_payout
+    assert started.value_at_risk == before_start.value_at_risk
+
+
+def test_current_round_ignores_later_market_updates(vault):
+    vault.start_new_option_round()
+    report = analyze_current_round(vault, SCENARIOS, seed=3)
+    vault.market_aggregator.set_prev_month_avg_basefee(40 * 10**9)
+    vault.market_aggregator.set_current_month_avg_basefee(50 * 10**9)
+    assert analyze_current_round(vault, SCENARIOS, seed=3).expected_payout == report.expected_payout
+
+
+def test_current_round_requires_a_started_round(vault):
+    with pytest.raises(ValueError):
+        analyze_current_round(vault, SCENARIOS)
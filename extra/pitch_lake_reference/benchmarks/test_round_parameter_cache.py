@@ -0,0 +1,33 @@
+from generators import PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV
+from pitch_lake_reference import OutOfTheMoneyStrategy, RoundParameterCache, StrikePriceStrategy
+from portfolio import PortfolioMarketFeed
+
+COLLATERAL = 10**6 * 10**18
+
+
+class ScaledStdDevStrategy(StrikePriceStrategy):
+    def __init__(self, market_aggregator, multiple):
+        super().__init__(market_aggregator)
+        self.multiple = multiple
+
+    def strike_price(self, base_fee, std_dev):
+        return base_fee - self.multiple * std_dev
+
+
+def test_strategies_with_state_do_not_share_entries():
+    cache = RoundParameterCache()
+    feed = PortfolioMarketFeed()
+    one, two = ScaledStdDevStrategy(feed, 1), ScaledStdDevStrategy(feed, 2)
+    assert cache.get_or_derive(one, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL).strike_price == 16 * 10**9
+    assert cache.get_or_derive(two, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL).strike_price == 12 * 10**9
+    assert cache.get_or_derive(one, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL).strike_price == 16 * 10**9
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_stateless_strategies_share_entries_across_instances():
+    cache = RoundParameterCache()
+    first, second = OutOfTheMoneyStrategy(PortfolioMarketFeed()), OutOfTheMoneyStrategy(PortfolioMarketFeed())
+    params = cache.get_or_derive(first, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL)
+    assert cache.get_or_derive(second, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL) is params
+    assert cache.evict(second, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL)
+    assert not cache.evict(first, PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, COLLATERAL)
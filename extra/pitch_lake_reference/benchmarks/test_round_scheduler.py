@@ -0,0 +1,26 @@
+from generators import make_vault
+from pitch_lake_reference import RoundState
+from round_scheduler import RoundScheduler, Transition
+
+
+def test_auction_without_bids_does_not_stop_the_scheduler():
+    vaults = [make_vault(), make_vault()]
+    settled = []
+
+    def after_transition(vault, scheduled):
+        # Only the first vault's auctions get a bid.
+        if scheduled.transition == Transition.START_ROUND and vault is vaults[0]:
+            vault.blockchain.set_current_sender("bidder")
+            vault.auction_place_bid(100 * 10**18, 10**18)
+        if scheduled.transition == Transition.SETTLE_OPTION_ROUND:
+            settled.append((vaults.index(vault), vault.current_round_id))
+
+    scheduler = RoundScheduler(vaults[0].blockchain, after_transition=after_transition)
+    for vault in vaults:
+        scheduler.add_vault(vault)
+
+    while len(settled) < 4:
+        assert scheduler.step() is not None
+    assert sorted(settled) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert vaults[0].rounds[0].total_options_sold == 100
+    assert vaults[1].rounds[0].state == RoundState.OPTION_SETTLED and vaults[1].rounds[0].total_options_sold is None
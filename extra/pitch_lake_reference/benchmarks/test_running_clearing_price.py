@@ -0,0 +1,59 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from generators import generate_bids, make_vault, open_auction
+from pitch_lake_reference import RunningClearingPrice
+
+# RunningClearingPrice against a recomputation from every bid so far, after each bid, over randomized auctions.
+
+PRICES = [100, 120, 150, 200, 210, 300, 333, 500]
+
+
+def indicative_price(bids, total_options_forsale):
+    """
+    The highest bid price where the wei bid at or above it, divided by it, covers the options for sale;
+    the lowest bid price if none does.
+    """
+    levels = sorted({price for price, _ in bids}, reverse=True)
+    for level in levels:
+        if sum(size for price, size in bids if price >= level) / level >= total_options_forsale:
+            return level
+    return levels[-1]
+
+
+@pytest.fixture(scope="module")
+def vault():
+    return make_vault(collateral=10**22)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_recomputation_after_every_bid(vault, seed):
+    rng = random.Random(seed)
+    total_options_forsale = rng.choice([0, 1, 10, 100, 1000])
+    running_clearing_price = RunningClearingPrice(total_options_forsale)
+    bids = []
+    for _ in range(rng.randint(1, 40)):
+        price = rng.choice(PRICES)
+        size = rng.randint(0, 3000) * rng.choice([1, price])
+        bids.append((price, size))
+        running_clearing_price.add_bid(price, size)
+        assert running_clearing_price.price == indicative_price(bids, total_options_forsale)
+        # Whole-option demand never exceeds wei demand, so settlement never clears above the indicative price.
+        round = SimpleNamespace(bids=[{'price': price, 'size': size} for price, size in bids], reserve_price=0,
+                                total_options_forsale=total_options_forsale)
+        assert vault._calculate_clearing_price(round) <= running_clearing_price.price
+
+
+def test_vault_streams_indicative_price():
+    vault = make_vault()
+    round_id, params = open_auction(vault)
+    bids = []
+    for bidder, size, price in generate_bids(7, 300, int(params.total_options_forsale)):
+        vault.blockchain.set_current_sender(bidder)
+        vault.auction_place_bid(size, price)
+        bids.append((price, size))
+        clearing_price, options_covered = vault.indicative_clearing_price(round_id)
+        assert clearing_price == indicative_price(bids, params.total_options_forsale)
+        assert options_covered == sum(size for bid_price, size in bids if bid_price >= clearing_price) / clearing_price
@@ -0,0 +1,65 @@
+import pytest
+
+from generators import aged_vault, generate_bids, make_vault, open_auction, place_bids, run_round
+
+SEED = 1234
+
+
+@pytest.mark.parametrize("num_bids", [100, 1000, 10000])
+def test_bid_placement_throughput(benchmark, num_bids):
+    bids = generate_bids(SEED, num_bids, 62500)
+
+    def setup():
+        vault = make_vault()
+        open_auction(vault)
+        return (vault, bids), {}
+
+    benchmark.extra_info["operations"] = num_bids
+    benchmark.pedantic(place_bids, setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize("num_bids", [50, 200, 800])
+def test_clearing_price_vs_bid_count(benchmark, num_bids):
+    vault = make_vault()
+    open_auction(vault)
+    place_bids(vault, generate_bids(SEED, num_bids, 62500))
+    current_round = vault.fetch_current_round()
+
+    clearing_price = benchmark(vault._calculate_clearing_price, current_round)
+    assert clearing_price > 0
+
+
+@pytest.mark.parametrize("num_bids", [1000, 10000, 100000])
+def test_distribution_vs_bid_count(benchmark, num_bids):
+    vault = make_vault()
+    open_auction(vault)
+    place_bids(vault, generate_bids(SEED, num_bids, 62500))
+    current_round = vault.fetch_current_round()
+    # Distribution only needs a clearing price; pick the median bid price instead of paying for the full clearing.
+    current_round.auction_clearing_price = sorted(bid["price"] for bid in current_round.bids)[num_bids // 2]
+
+    benchmark(vault._distribute_options_based_on_clearing_price, current_round)
+    assert current_round.option_allocations
+
+
+@pytest.mark.parametrize("num_rounds", [1, 10, 50])
+def test_collateral_balance_of_vs_position_age(benchmark, num_rounds):
+    vault = aged_vault(num_rounds, SEED)
+
+    balance = benchmark(vault.collateral_balance_of, 0)
+    assert balance > 0
+
+
+@pytest.mark.parametrize("bids_per_round", [10, 100])
+def test_end_to_end_rounds_per_second(benchmark, bids_per_round):
+    num_rounds = 10
+
+    def run_rounds():
+        vault = make_vault()
+        for r in range(num_rounds):
+            run_round(vault, generate_bids(SEED + r, bids_per_round, 62500))
+        return vault
+
+    benchmark.extra_info["rounds"] = num_rounds
+    vault = benchmark.pedantic(run_rounds, rounds=3)
+    assert vault.current_round_id == num_rounds - 1
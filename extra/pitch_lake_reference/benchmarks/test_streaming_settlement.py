@@ -0,0 +1,42 @@
+import pytest
+
+from generators import end_auction, generate_bids, make_vault, open_auction, place_bids
+from streaming_settlement import iter_results, settle_auction_from_file, write_bids
+
+# Binary bid files need integer bidder IDs.
+BIDS = [(index, size, price) for index, (_, size, price) in enumerate(generate_bids(21, 300, 62500))]
+
+
+def settled_vaults(tmp_path, fmt):
+    # make_vault's vaults share one clock, so each runs its auction in turn.
+    in_memory = make_vault()
+    open_auction(in_memory)
+    place_bids(in_memory, BIDS)
+    end_auction(in_memory)
+    in_memory.settle_auction()
+
+    bid_path, result_path = str(tmp_path / f"bids.{fmt}"), str(tmp_path / f"results.{fmt}")
+    write_bids(bid_path, BIDS, fmt)
+    streamed = make_vault()
+    open_auction(streamed)
+    end_auction(streamed)
+    # Small chunks and fan-in, so the external sort writes many runs and merges them over several passes.
+    clearing_price = settle_auction_from_file(streamed, bid_path, result_path, fmt, chunk_size=16, workdir=str(tmp_path), fan_in=3)
+    return in_memory, streamed, clearing_price, result_path
+
+
+@pytest.mark.parametrize("fmt", ["bin", "csv"])
+def test_streaming_settlement_agrees_with_settle_auction(tmp_path, fmt):
+    in_memory, streamed, clearing_price, result_path = settled_vaults(tmp_path, fmt)
+    expected, actual = in_memory.fetch_current_round(), streamed.fetch_current_round()
+    assert clearing_price == expected.auction_clearing_price == actual.auction_clearing_price
+    assert actual.total_options_sold == expected.total_options_sold
+    assert actual.total_premiums_collected == expected.total_premiums_collected
+
+    results = list(iter_results(result_path, fmt))
+    bid_results = list(in_memory.bid_results(in_memory.current_round_id))
+    assert len(results) == len(bid_results) == len(BIDS)
+    for (bid_index, bidder_id, options, refund), (bid_id, _, bidder, _, _, expected_options, expected_refund) in zip(results, bid_results):
+        assert bid_index == bid_id and str(bidder_id) == str(bidder)
+        assert options == expected_options
+        assert refund == expected_refund
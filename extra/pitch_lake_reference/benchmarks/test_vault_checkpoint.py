@@ -0,0 +1,63 @@
+from generators import PREV_MONTH_AVG_BASEFEE, PREV_MONTH_STD_DEV, SETTLEMENT_BASEFEE, end_auction, expire_options, open_auction, place_bids
+from pitch_lake_reference import OutOfTheMoneyStrategy, RoundState, Vault
+from portfolio import PortfolioBlockchain, PortfolioMarketFeed
+from vault_checkpoint import load_checkpoint, write_checkpoint
+
+# None of these amounts is exactly representable as a float64.
+DEPOSITS = [3 * 10**23 + 1, 10**23 + 7, 2 * 10**23 + 5]
+FIRST_BIDS = [("bidder0", 5000 * 10**18 + 11, 10**18 + 3)]
+LATER_BIDS = [("bidder1", 3000 * 10**18 + 5, 3 * 10**18 // 2 + 1), ("bidder2", 10**18 + 1, 10**18 + 3)]
+
+
+def market_feed():
+    feed = PortfolioMarketFeed()
+    feed.set_prev_month_avg_basefee(PREV_MONTH_AVG_BASEFEE)
+    feed.set_prev_month_std_dev(PREV_MONTH_STD_DEV)
+    feed.set_current_month_avg_basefee(SETTLEMENT_BASEFEE)
+    return feed
+
+
+def restored(vault, path):
+    write_checkpoint(vault, str(path))
+    blockchain = PortfolioBlockchain()
+    blockchain.set_current_time(vault.blockchain.get_current_time())
+    return load_checkpoint(str(path), blockchain, vault.market_aggregator)
+
+
+def state(vault):
+    rounds = [(round_id, r.state, r.total_collateral_at_initialization, r.total_collateral_at_settlement, r.total_options_sold,
+               r.auction_clearing_price, r.total_premiums_collected, r.option_allocations, r.refunds)
+              for round_id, r in sorted(vault.rounds.items())]
+    balances = [(vault.collateral_balance_of(position_id), vault.premium_balance_of(position_id)) for position_id in range(len(DEPOSITS))]
+    return rounds, balances, vault.total_collateral()
+
+
+def test_restored_vault_continues_the_round_exactly(tmp_path):
+    vault = Vault(OutOfTheMoneyStrategy(market_feed()), PortfolioBlockchain(), market_feed())
+    for index, amount in enumerate(DEPOSITS):
+        vault.blockchain.set_current_sender(f"lp{index}")
+        vault.open_liquidity_position(amount)
+    open_auction(vault)
+    place_bids(vault, FIRST_BIDS)
+
+    # Checkpoint mid-auction, then drive the original and the restored vault through the rest of the round.
+    vaults = [vault, restored(vault, tmp_path / "auction.plck")]
+    assert vaults[1].indicative_clearing_price(0) == vault.indicative_clearing_price(0)
+    for v in vaults:
+        place_bids(v, LATER_BIDS)
+        end_auction(v)
+        v.settle_auction()
+        expire_options(v)
+        v.settle_option_round()
+    assert state(vaults[1]) == state(vault)
+    assert vault.fetch_current_round().state == RoundState.OPTION_SETTLED and vault.fetch_current_round().total_payout > 0
+
+    # Checkpoint the settled round and withdraw every position in full from the restored copy.
+    vaults.append(restored(vault, tmp_path / "settled.plck"))
+    assert state(vaults[2]) == state(vault)
+    for v in vaults:
+        for position_id in range(len(DEPOSITS)):
+            balance = v.collateral_balance_of(position_id)
+            assert isinstance(balance, int) and balance > 2**53
+            assert v.withdraw_liquidity(position_id, balance)
+        assert v.total_collateral() == 0 and v.fetch_next_round().total_collateral_at_initialization == 0
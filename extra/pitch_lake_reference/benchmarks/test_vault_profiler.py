@@ -0,0 +1,28 @@
+import pytest
+
+from generators import end_auction, expire_options, generate_bids, make_vault, open_auction, place_bids
+from pitch_lake_reference import VaultRejection
+from vault_profiler import VaultProfiler
+
+
+def test_work_is_counted_only_for_calls_that_succeed():
+    vault = make_vault(num_lps=3)
+    open_auction(vault)
+    place_bids(vault, generate_bids(1, 10, 62500))
+    profiler = VaultProfiler(vault)
+    profiler.enable()
+
+    with pytest.raises(VaultRejection):
+        vault.settle_auction()  # the auction is still open
+    with pytest.raises(VaultRejection):
+        vault.settle_option_round()  # the options have not expired
+    assert profiler.counters["bids_scanned"] == 0 and profiler.counters["positions_compacted"] == 0
+
+    end_auction(vault)
+    vault.settle_auction()
+    expire_options(vault)
+    vault.settle_option_round()
+    profiler.disable()
+    assert profiler.counters["bids_scanned"] == 2 * 10
+    assert profiler.counters["positions_compacted"] == 3
+    assert profiler.counters["settle_option_round.calls"] == 2
@@ -0,0 +1,286 @@
+import json
+import math
+import mmap
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# A small Arrow/Parquet-style columnar container built on the standard library only, shared by the
+# round-history export and the vault checkpoint. A file holds one or more named tables.
+#
+# File layout:
+#   MAGIC
+#   column chunks, each padded to 8 bytes (chunks of different tables may interleave)
+#   footer (JSON: per-table schema, chunk offsets and string dictionaries, plus the caller's metadata)
+#   footer length (uint64, little endian)
+#   MAGIC
+#
+# Column types:
+#   "int"   -> int64
+#   "float" -> float64; None is stored as NaN
+#   "str"   -> dictionary encoded, int32 codes into a per-column dictionary stored in the footer
+#   "num"   -> exact wei amounts and counts, three uint64 per value: a tag (0 None, 1 int, 2 float) and the
+#              value split into low and high 64 bits (int128 two's complement for ints, the float64 bits for
+#              floats). The reference model mixes ints and floats, so both round-trip unchanged.
+
+DEFAULT_CHUNK_ROWS = 65536
+
+_TYPECODES = {"int": "q", "float": "d", "str": "i", "num": "Q"}
+_NUM_WIDTH = 3
+_NUM_NONE, _NUM_INT, _NUM_FLOAT = 0, 1, 2
+_MASK64 = (1 << 64) - 1
+_INT128_MIN, _INT128_MAX = -(1 << 127), (1 << 127) - 1
+_FLOAT_BITS = struct.Struct("<d")
+_UINT64 = struct.Struct("<Q")
+
+
+def _encode_num(value) -> Tuple[int, int, int]:
+    if value is None:
+        return _NUM_NONE, 0, 0
+    if isinstance(value, float):
+        return _NUM_FLOAT, _UINT64.unpack(_FLOAT_BITS.pack(value))[0], 0
+    value = int(value)
+    if not _INT128_MIN <= value <= _INT128_MAX:
+        raise ValueError(f"{value} does not fit in 128 bits.")
+    return _NUM_INT, value & _MASK64, (value >> 64) & _MASK64
+
+
+def _decode_nums(words: List[int]) -> list:
+    values = []
+    for i in range(0, len(words), _NUM_WIDTH):
+        tag, low, high = words[i], words[i + 1], words[i + 2]
+        if tag == _NUM_INT:
+            value = low | (high << 64)
+            values.append(value - (1 << 128) if high >> 63 else value)
+        elif tag == _NUM_FLOAT:
+            values.append(_FLOAT_BITS.unpack(_UINT64.pack(low))[0])
+        else:
+            values.append(None)
+    return values
+
+
+class TableWriter:
+    """
+    Buffers one table's rows in typed arrays and flushes them to the file every `chunk_rows` rows.
+    """
+
+    def __init__(self, writer: "ColumnarWriter", schema: List[Tuple[str, str]], chunk_rows: int):
+        for name, column_type in schema:
+            if column_type not in _TYPECODES:
+                raise ValueError(f"Unsupported column type {column_type} for column {name}.")
+        if chunk_rows <= 0:
+            raise ValueError("chunk_rows must be positive.")
+        self._writer = writer
+        self.schema = schema
+        self.chunk_rows = chunk_rows
+        self.num_rows = 0
+        self.chunks: List[Dict] = []
+        self.dictionaries: Dict[str, Dict[str, int]] = {name: {} for name, column_type in schema if column_type == "str"}
+        self._buffers = self._new_buffers()
+        self._buffered = 0
+
+    def _new_buffers(self) -> List[array]:
+        return [array(_TYPECODES[column_type]) for _, column_type in self.schema]
+
+    def append(self, row: tuple):
+        if len(row) != len(self.schema):
+            raise ValueError(f"Expected {len(self.schema)} values, got {len(row)}.")
+        for buffer, (name, column_type), value in zip(self._buffers, self.schema, row):
+            if column_type == "str":
+                dictionary = self.dictionaries[name]
+                key = "" if value is None else str(value)
+                code = dictionary.get(key)
+                if code is None:
+                    code = dictionary[key] = len(dictionary)
+                buffer.append(code)
+            elif column_type == "num":
+                buffer.extend(_encode_num(value))
+            elif column_type == "float":
+                buffer.append(math.nan if value is None else float(value))
+            else:
+                buffer.append(int(value))
+        self._buffered += 1
+        if self._buffered >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self._buffered == 0:
+            return
+        self.chunks.append({"rows": self._buffered, "columns": [self._writer._write_column(buffer) for buffer in self._buffers]})
+        self.num_rows += self._buffered
+        self._buffers = self._new_buffers()
+        self._buffered = 0
+
+
+class ColumnarWriter:
+    """
+    Streams tables into a columnar file. Memory stays bounded by one chunk per open table.
+
+    Usage:
+        with ColumnarWriter(path, MAGIC, FORMAT_VERSION) as writer:
+            rounds = writer.add_table("rounds", ROUND_SCHEMA)
+            rounds.append(row)
+            writer.metadata["vault"] = {...}  # extra footer entries
+    """
+
+    def __init__(self, path: str, magic: bytes, version: int):
+        self.path = path
+        self.magic = magic
+        self.version = version
+        self.metadata: Dict = {}
+        self.tables: Dict[str, TableWriter] = {}
+        self._file = open(path, "wb")
+        self._file.write(magic)
+
+    def add_table(self, name: str, schema: List[Tuple[str, str]], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> TableWriter:
+        if name in self.tables:
+            raise ValueError(f"Table {name} already exists.")
+        table = self.tables[name] = TableWriter(self, schema, chunk_rows)
+        return table
+
+    def _write_column(self, buffer: array) -> List[int]:
+        data = buffer.tobytes()
+        offset = self._file.tell()
+        self._file.write(data)
+        padding = -len(data) % 8
+        if padding:
+            self._file.write(b"\x00" * padding)
+        return [offset, len(data)]
+
+    def close(self):
+        if self._file.closed:
+            return
+        tables = {}
+        for name, table in self.tables.items():
+            table.flush()
+            tables[name] = {
+                "schema": table.schema,
+                "num_rows": table.num_rows,
+                "chunks": table.chunks,
+                "dictionaries": {column: list(dictionary) for column, dictionary in table.dictionaries.items()},
+            }
+        footer = json.dumps({**self.metadata, "version": self.version, "byteorder": "little", "tables": tables}).encode()
+        self._file.write(footer)
+        self._file.write(struct.pack("<Q", len(footer)))
+        self._file.write(self.magic)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ColumnarReader:
+    """
+    Memory-mapped reader for files written by ColumnarWriter. Opening parses only the footer.
+
+    Column chunks are returned as memoryviews over the mapping, so nothing is copied or unpickled.
+    Release any views you hold before calling close().
+    """
+
+    def __init__(self, path: str, magic: bytes, version: int, description: str = "columnar file"):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        if size < 2 * len(magic) + 8 or self._mmap[:len(magic)] != magic or self._mmap[size - len(magic):] != magic:
+            self.close()
+            raise ValueError(f"{path} is not a {description}.")
+        footer_end = size - len(magic) - 8
+        (footer_length,) = struct.unpack_from("<Q", self._mmap, footer_end)
+        footer = json.loads(self._mmap[footer_end - footer_length:footer_end])
+        if footer["version"] != version:
+            self.close()
+            raise ValueError(f"Unsupported {description} format version {footer['version']}.")
+        self.metadata: Dict = footer
+        self._tables: Dict[str, Dict] = footer["tables"]
+        self._column_index = {
+            table: {name: i for i, (name, _) in enumerate(info["schema"])} for table, info in self._tables.items()
+        }
+        self._view = memoryview(self._mmap)
+
+    @property
+    def table_names(self) -> List[str]:
+        return list(self._tables)
+
+    def _table(self, table: Optional[str]) -> str:
+        if table is None:
+            if len(self._tables) != 1:
+                raise ValueError("This file holds several tables; name one.")
+            return next(iter(self._tables))
+        if table not in self._tables:
+            raise KeyError(f"Unknown table {table}.")
+        return table
+
+    def schema(self, table: Optional[str] = None) -> List[Tuple[str, str]]:
+        return [tuple(column) for column in self._tables[self._table(table)]["schema"]]
+
+    def column_names(self, table: Optional[str] = None) -> List[str]:
+        return [name for name, _ in self.schema(table)]
+
+    def num_rows(self, table: Optional[str] = None) -> int:
+        return self._tables[self._table(table)]["num_rows"]
+
+    def num_chunks(self, table: Optional[str] = None) -> int:
+        return len(self._tables[self._table(table)]["chunks"])
+
+    def dictionary(self, name: str, table: Optional[str] = None) -> List[str]:
+        return self._tables[self._table(table)]["dictionaries"][name]
+
+    def iter_chunks(self, columns: Optional[List[str]] = None, table: Optional[str] = None) -> Iterator[Dict[str, memoryview]]:
+        """
+        Yield one {column name: memoryview} mapping per chunk without copying the data.
+
+        String columns are yielded as their int32 dictionary codes (see `dictionary`), and "num" columns as
+        three uint64 words per value.
+        """
+        table = self._table(table)
+        info = self._tables[table]
+        index = self._column_index[table]
+        names = columns if columns is not None else self.column_names(table)
+        for name in names:
+            if name not in index:
+                raise KeyError(f"Unknown column {name}.")
+        for chunk in info["chunks"]:
+            views = {}
+            for name in names:
+                offset, length = chunk["columns"][index[name]]
+                views[name] = self._view[offset:offset + length].cast(_TYPECODES[info["schema"][index[name]][1]])
+            yield views
+
+    def column(self, name: str, table: Optional[str] = None) -> list:
+        """
+        Materialize a whole column as a Python list, decoding string and "num" columns.
+        """
+        table = self._table(table)
+        values = []
+        for chunk in self.iter_chunks([name], table):
+            values.extend(chunk[name].tolist())
+            chunk[name].release()
+        column_type = self._tables[table]["schema"][self._column_index[table][name]][1]
+        if column_type == "str":
+            dictionary = self.dictionary(name, table)
+            values = [dictionary[code] for code in values]
+        elif column_type == "num":
+            values = _decode_nums(values)
+        return values
+
+    def rows(self, table: Optional[str] = None) -> List[tuple]:
+        names = self.column_names(table)
+        return list(zip(*(self.column(name, table) for name in names)))
+
+    def close(self):
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
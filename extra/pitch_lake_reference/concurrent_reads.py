@@ -0,0 +1,202 @@
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pitch_lake_reference import Vault
+from vault_profiler import install_wrappers, remove_wrappers
+
+# Vault methods that mutate state. While a VaultSeqLock is enabled each of them runs inside a write section.
+WRITE_METHODS = [
+    "open_liquidity_position",
+    "deposit_liquidity_to",
+    "withdraw_liquidity",
+    "start_new_option_round",
+    "auction_place_bid",
+    "settle_auction",
+    "settle_option_round",
+    "refund_unused_bid_deposit",
+    "claim_option_payout",
+    "batch_refund_unused_bid_deposits",
+    "batch_claim_option_payouts",
+]
+
+# Writes that walk every bid or position. Before one starts, a copy-on-write view of the vault is published,
+# and readers answer from that view for the duration of the write instead of waiting for it. The view copies
+# only what these writes rebind: the current and next rounds and the position store's round maps.
+LONG_WRITE_METHODS = [
+    "settle_auction",
+    "settle_option_round",
+]
+
+
+class VaultSeqLock:
+    """
+    Seqlock over a live Vault: one writer thread, any number of readers, and readers never block the writer.
+
+    The writer bumps a sequence number before and after every mutating call, so it is odd while a write
+    is in progress. A reader notes the sequence, runs its read, and retries if the sequence was odd or
+    has changed since; a successful read is consistent as of `version` (the even sequence it saw).
+
+    Readers take no lock at all, so on a free-threaded interpreter they run in parallel with each other
+    and with the writer; under the GIL they interleave with it instead of waiting for a lock.
+
+    Short writes are waited out. Long writes (LONG_WRITE_METHODS) first publish a view of the vault as it
+    was before the write, RCU style, and a read that finds such a write in progress runs against that view
+    and returns the version it was taken at. The view is a shallow copy-on-write of the objects the long
+    write rebinds (see _publish_view), so publishing it costs O(rounds), not a copy of every bid and
+    position. Everything else is shared with the live vault and only stays unchanged until the next write
+    starts, so a view read is accepted only if that write is still in progress when it finishes. Only
+    readers that are methods of the vault, or snapshot(), can be redirected to the view; other callables wait.
+
+    Usage:
+        lock = VaultSeqLock(vault)
+        lock.enable()                     # the writer keeps calling vault methods as before
+        balance, version = lock.read(vault.collateral_balance_of, lp_id)   # from any reader thread
+    """
+
+    def __init__(self, vault: Vault, write_methods: Optional[List[str]] = None, long_write_methods: Optional[List[str]] = None):
+        self.vault = vault
+        self.write_methods = write_methods if write_methods is not None else WRITE_METHODS
+        self.long_write_methods = set(long_write_methods if long_write_methods is not None else LONG_WRITE_METHODS)
+        self.sequence = 0
+        self.retries = 0  # reads that had to be repeated; updated without a lock, so approximate
+        self.view_reads = 0  # reads answered from a published view; approximate as well
+        self._writer = threading.RLock()  # serializes writers; readers never touch it
+        self._depth = 0
+        self._view: Optional[Tuple[int, Vault]] = None  # (version, view) published for the long write in progress
+        self._installed: Dict[str, Tuple[object, object]] = {}
+        self.enabled = False
+
+    def enable(self):
+        if self.enabled:
+            return
+        self._installed = install_wrappers(self.vault, self.write_methods, self._wrap)
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        remove_wrappers(self.vault, self._installed)
+        self._installed = {}
+        self.enabled = False
+
+    def _publish_view(self) -> Vault:
+        """
+        A vault that reads as the live one does now and that settle_auction and settle_option_round leave alone.
+
+        Both writes only rebind attributes: of the current round, the next round's collateral, and the position
+        store, whose round maps lose the settled round. Those objects and maps are copied shallowly; bids,
+        positions and balance lists are shared, since the writes replace them rather than change them in place.
+        """
+        vault = self.vault
+        view = copy.copy(vault)
+        for name, value in list(view.__dict__.items()):
+            if hasattr(value, "__wrapped__"):
+                del view.__dict__[name]  # instrumentation wrappers still point at the live vault
+        view.rounds = dict(vault.rounds)
+        for round_id in (vault.current_round_id, vault.next_round_id):
+            if round_id in view.rounds:
+                view.rounds[round_id] = copy.copy(view.rounds[round_id])
+        store = view.round_positions = copy.copy(vault.round_positions)
+        store.rounds = dict(store.rounds)
+        store.round_totals = dict(store.round_totals)
+        return view
+
+    def _wrap(self, name: str, method):
+        long_write = name in self.long_write_methods
+
+        def guarded(*args, **kwargs):
+            with self._writer:
+                self._depth += 1
+                if self._depth == 1:
+                    if long_write:
+                        self._view = (self.sequence, self._publish_view())
+                    self.sequence += 1  # odd: write in progress
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    if self._depth == 1:
+                        self.sequence += 1  # even: published
+                        self._view = None
+                    self._depth -= 1
+
+        guarded.__wrapped__ = method
+        return guarded
+
+    def _read(self, read_from: Callable[[Vault], Any], use_view: bool = True) -> Tuple[Any, int]:
+        while True:
+            start = self.sequence
+            vault, version = self.vault, start
+            if start & 1:
+                view = self._view
+                if not use_view or view is None or view[0] != start - 1:
+                    self.retries += 1
+                    time.sleep(0)  # let the writer finish
+                    continue
+                # The view was published for exactly this write, which leaves it alone; later writes may not,
+                # so the read below only counts if this write is still the one in progress when it ends.
+                version, vault = view
+            try:
+                result = read_from(vault)
+            except Exception:
+                if self.sequence == start:
+                    raise  # a genuine error, not a torn read
+                self.retries += 1
+                continue
+            if self.sequence == start:
+                if start & 1:
+                    self.view_reads += 1
+                return result, version
+            self.retries += 1
+
+    def read(self, reader: Callable[..., Any], *args, **kwargs) -> Tuple[Any, int]:
+        """
+        Run `reader(*args, **kwargs)` until it completes without overlapping a write. If `reader` is a method
+        of the vault and a long write is in progress, it runs against the view published for that write.
+
+        :return: (result, version) where version is the sequence number the result is consistent with.
+        """
+        if getattr(reader, "__self__", None) is self.vault:
+            function = reader.__func__
+            return self._read(lambda vault: function(vault, *args, **kwargs))
+        return self._read(lambda vault: reader(*args, **kwargs), use_view=False)
+
+    def snapshot(self, option_round_id: Optional[int] = None, option_buyers: Optional[List] = None,
+                 lp_ids: Optional[List[int]] = None) -> "VaultSnapshot":
+        """
+        Read round parameters and balances for many accounts as one consistent snapshot.
+        """
+
+        def read_all(vault: Vault):
+            round_id = vault.current_round_id if option_round_id is None else option_round_id
+            if round_id is None:
+                # No round has started yet.
+                round_state, params, option_balances = None, None, {buyer: 0 for buyer in option_buyers or []}
+            else:
+                round_state = vault.rounds[round_id].state
+                params = vault.get_option_round_params(round_id)
+                option_balances = {buyer: vault.option_balance_of(round_id, buyer) for buyer in option_buyers or []}
+            return VaultSnapshot(
+                version=None,
+                round_id=round_id,
+                round_state=round_state,
+                option_round_params=params,
+                option_balances=option_balances,
+                collateral_balances={lp_id: vault.collateral_balance_of(lp_id) for lp_id in lp_ids or []},
+            )
+
+        snapshot, version = self._read(read_all)
+        snapshot.version = version
+        return snapshot
+
+
+class VaultSnapshot:
+    def __init__(self, version: int, round_id: Optional[int], round_state, option_round_params, option_balances: Dict[Any, int],
+                 collateral_balances: Dict[int, int]):
+        self.version = version
+        self.round_id = round_id
+        self.round_state = round_state
+        self.option_round_params = option_round_params
+        self.option_balances = option_balances
+        self.collateral_balances = collateral_balances
@@ -0,0 +1,430 @@
+import argparse
+import contextlib
+import copy
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pitch_lake_reference import AtTheMoneyStrategy, RoundParameterCache, RoundParameters, RoundState, Vault, VaultConfig
+from portfolio import PortfolioBlockchain, PortfolioMarketFeed
+
+# Replays the rounds recorded by the TypeScript/Katana simulation (scripts/simulationTests) against the
+# reference Vault, offline, and diffs every recorded balance vector against the model.
+#
+# The recordings hold balances, not the randomly drawn inputs that produced them, so inputs are inferred,
+# always from differences between recorded values and never from the model's own state:
+#   deposits     LP unlocked balance in the open state minus the previous round's settled state
+#   bids         bidder ETH in the open state minus the auctioning state, at the recorded reserve price
+#   withdrawals  the LP's recorded running balance (locked + unlocked) less its share of the payout the
+#                bidders received, minus its recorded settled balance
+# Bid inputs make the auctioning bidder balances match by construction. Every other vector is a check: a
+# deposit only reproduces the recorded open balance if the model's previous settled balance was right.
+#
+# Model balances are reported the way the Cairo vault reports them. While the auction runs, all collateral
+# is locked. Once it settles, only the sold share stays locked; unsold collateral and the round's premiums
+# are unlocked. After the round settles, everything is unlocked.
+#
+# The reserve price and supply the simulation used are pinned through the replay vault's round parameter
+# source (RecordedRoundParameters), so each round starts with them rather than having them patched in.
+
+
+class KnownDivergence:
+    """
+    A documented reason the model and a recording differ. A mismatch it applies to is reported as explained
+    and does not fail the scenario; any other mismatch does.
+    """
+
+    def __init__(self, description: str, applies: Callable[["RecordedRound", "Mismatch"], bool]):
+        self.description = description
+        self.applies = applies
+
+
+def _older_format_after_first_auction(recorded_round: "RecordedRound", mismatch: "Mismatch") -> bool:
+    return recorded_round.options_available is None and (mismatch.round_index > 0 or mismatch.state in ("runningStateData", "settledStateData"))
+
+
+KNOWN_DIVERGENCES = [
+    KnownDivergence(
+        "Recordings without optionsAvailable (the older simulationResultsExample.json format) record neither the supply "
+        "nor the bid prices, so their auctions cannot be replayed: bids go in at the reserve price against the model's "
+        "own supply, which for their small deposits is 0 options. Every balance from the first auction's settlement on "
+        "follows from that auction.",
+        _older_format_after_first_auction,
+    ),
+]
+
+SIMULATION_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts", "simulationData")
+DEFAULT_MARKET_DATA = os.path.join(SIMULATION_DATA_DIR, "marketData.json")
+DEFAULT_SCENARIO_PATHS = [os.path.join(SIMULATION_DATA_DIR, "simulationOutput"), os.path.join(SIMULATION_DATA_DIR, "simulationResultsExample.json")]
+
+STATES = ["openStateData", "auctioningStateData", "runningStateData", "settledStateData"]
+
+
+class Mismatch:
+    def __init__(self, round_index: int, state: str, field: str, index: Optional[int], expected, actual):
+        self.round_index = round_index
+        self.state = state
+        self.field = field
+        self.index = index  # account index within the vector, None for scalars
+        self.expected = expected  # recorded by the TS simulation
+        self.actual = actual  # computed by the reference model
+
+    def __str__(self):
+        where = f"{self.field}[{self.index}]" if self.index is not None else self.field
+        return f"round {self.round_index} {self.state} {where}: expected {self.expected}, got {self.actual:.0f}"
+
+
+class ScenarioResult:
+    def __init__(self, path: str):
+        self.path = path
+        self.rounds_checked = 0
+        self.values_checked = 0
+        self.mismatches: List[Mismatch] = []  # not explained by any KNOWN_DIVERGENCES entry
+        self.explained: Dict[int, int] = {}  # index in KNOWN_DIVERGENCES -> mismatches it explains
+        self.error: Optional[str] = None  # set when the model rejected a step and the replay stopped
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.mismatches
+
+
+class DifferentialReport:
+    def __init__(self, results: List[ScenarioResult]):
+        self.results = results
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    def summary(self, max_mismatches: int = 10) -> str:
+        passed = sum(1 for result in self.results if result.ok)
+        lines = [f"{passed}/{len(self.results)} scenarios match"]
+        explained = {}
+        for result in self.results:
+            for index, count in result.explained.items():
+                explained[index] = explained.get(index, 0) + count
+        if explained:
+            lines.append("Mismatches explained by known divergences:")
+            lines.extend(f"  - {count} x {KNOWN_DIVERGENCES[index].description}" for index, count in sorted(explained.items()))
+        for result in self.results:
+            if result.ok:
+                continue
+            lines.append(f"{result.path}: {result.rounds_checked} rounds, {result.values_checked} values, {len(result.mismatches)} unexplained mismatches")
+            for mismatch in result.mismatches[:max_mismatches]:
+                lines.append(f"  {mismatch}")
+            if len(result.mismatches) > max_mismatches:
+                lines.append(f"  ... {len(result.mismatches) - max_mismatches} more")
+            if result.error:
+                lines.append(f"  stopped: {result.error}")
+        return "\n".join(lines)
+
+
+class RecordedState:
+    def __init__(self, data: Dict):
+        # The running and settled states of older recordings use "lpLockedUnlockedBalances".
+        balances = data.get("lockedUnlockedBalances") or data.get("lpLockedUnlockedBalances") or {}
+        self.lp_locked = [int(value) for value in balances.get("lpLockedBalances", [])]
+        self.lp_unlocked = [int(value) for value in balances.get("lpUnlockedBalances", [])]
+        self.bidders = [int(value) for value in data.get("ethBalancesBidders", [])]
+        vault_balances = data.get("vaultBalances")
+        self.vault_locked = int(vault_balances["vaultLocked"]) if vault_balances else None
+        self.vault_unlocked = int(vault_balances["vaultUnlocked"]) if vault_balances else None
+
+
+class RecordedRound:
+    def __init__(self, data: Dict, market_window: Dict):
+        self.states = {state: RecordedState(data[state]) for state in STATES}
+        self.options_available = int(data["optionsAvailable"]) if "optionsAvailable" in data else None
+        self.options_sold = int(data["optionsSold"]) if "optionsSold" in data else None
+        # Rounded down, as the TS simulation does before sending them on chain.
+        self.reserve_price = int(market_window["reserve_price"])
+        self.strike_price = int(market_window["strike_price"])
+        self.settlement_price = int(market_window["settlement_price"])
+        self.volatility = market_window["volatility"]  # in basis points
+        self.starting_timestamp = market_window["starting_timestamp"]
+
+
+def load_market_data(path: str = DEFAULT_MARKET_DATA) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_scenario(path: str, market_data: List[Dict]) -> List[RecordedRound]:
+    with open(path) as f:
+        results = json.load(f)["results"]
+    if len(results) > len(market_data):
+        raise ValueError(f"{path} has {len(results)} rounds but the market data only covers {len(market_data)}.")
+    return [RecordedRound(data, market_data[index]) for index, data in enumerate(results)]
+
+
+def find_scenarios(paths: Sequence[str]) -> List[str]:
+    """
+    Expand directories to the JSON recordings they contain.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            found.append(path)
+    return found
+
+
+def _replay_config() -> VaultConfig:
+    # The simulation deposits well under the reference model's minimums.
+    config = VaultConfig()
+    config.MIN_DEPOSIT_AMOUNT = 1
+    config.MIN_COLLATERAL = 1
+    return config
+
+
+class RecordedRoundParameters(RoundParameterCache):
+    """
+    Round parameter source for the replay vault. Rounds are derived as usual, then take the reserve price and,
+    where the recording has it, the supply of the recorded round set in `recorded_round`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.recorded_round: Optional[RecordedRound] = None
+
+    def get_or_derive(self, strategy, prev_month_avg_basefee, prev_month_std_dev, total_collateral) -> RoundParameters:
+        params = copy.copy(super().get_or_derive(strategy, prev_month_avg_basefee, prev_month_std_dev, total_collateral))
+        recorded_round = self.recorded_round
+        if recorded_round is not None:
+            params.reserve_price = recorded_round.reserve_price
+            if recorded_round.options_available is not None:
+                params.total_options_forsale = recorded_round.options_available
+        return params
+
+
+class ScenarioReplay:
+    """
+    Drives one reference Vault through a recorded scenario and diffs each state as it is reached.
+    """
+
+    def __init__(self, path: str, rounds: List[RecordedRound], rtol: float, atol: float):
+        self.result = ScenarioResult(path)
+        self.rounds = rounds
+        self.rtol = rtol
+        self.atol = atol
+        self.market_feed = PortfolioMarketFeed()
+        self.blockchain = PortfolioBlockchain()
+        self.round_parameters = RecordedRoundParameters()
+        self.vault = Vault(AtTheMoneyStrategy(self.market_feed), self.blockchain, self.market_feed, _replay_config(), self.round_parameters)
+        num_lps = len(rounds[0].states["openStateData"].lp_unlocked) if rounds else 0
+        num_bidders = len(rounds[0].states["openStateData"].bidders) if rounds else 0
+        self.lp_positions: List[Optional[int]] = [None] * num_lps  # LP index -> vault position ID
+        self.wallets = list(rounds[0].states["openStateData"].bidders) if rounds else []  # model bidder ETH
+        self.bidders = [f"bidder{index}" for index in range(num_bidders)]
+
+    def _check(self, round_index: int, state: str, field: str, expected, actual, index: Optional[int] = None):
+        self.result.values_checked += 1
+        if abs(expected - actual) <= max(self.atol, self.rtol * max(abs(expected), abs(actual))):
+            return
+        mismatch = Mismatch(round_index, state, field, index, expected, actual)
+        for divergence_index, divergence in enumerate(KNOWN_DIVERGENCES):
+            if divergence.applies(self.rounds[round_index], mismatch):
+                self.result.explained[divergence_index] = self.result.explained.get(divergence_index, 0) + 1
+                return
+        self.result.mismatches.append(mismatch)
+
+    def _locked_unlocked(self, collateral, unallocated):
+        """
+        Split a collateral balance and its unallocated liquidity into (locked, unlocked) as the Cairo vault reports them.
+        """
+        vault = self.vault
+        if vault.current_round_id is None:
+            return 0, collateral + unallocated
+        current_round = vault.fetch_current_round()
+        if current_round.state == RoundState.AUCTION_STARTED:
+            return collateral, unallocated
+        if current_round.state == RoundState.AUCTION_SETTLED:
+            # Only the sold share stays locked; unsold collateral and the premiums are unlocked.
+            options_sold = current_round.total_options_sold or 0
+            sold_share = options_sold / current_round.total_options_forsale if current_round.total_options_forsale else 0
+            initial = current_round.total_collateral_at_initialization
+            premiums = current_round.total_premiums_collected * collateral / initial if initial else 0
+            locked = collateral * sold_share
+            return locked, collateral - locked + premiums + unallocated
+        return 0, collateral + unallocated
+
+    def _lp_balances(self, lp_index: int):
+        position_id = self.lp_positions[lp_index]
+        if position_id is None:
+            return 0, 0
+        vault = self.vault
+        return self._locked_unlocked(vault.collateral_balance_of(position_id), vault.unallocated_liquidity_balance_of(position_id))
+
+    def _compare_state(self, round_index: int, state: str, recorded: RecordedState):
+        for lp_index, (expected_locked, expected_unlocked) in enumerate(zip(recorded.lp_locked, recorded.lp_unlocked)):
+            locked, unlocked = self._lp_balances(lp_index)
+            self._check(round_index, state, "lpLockedBalances", expected_locked, locked, lp_index)
+            self._check(round_index, state, "lpUnlockedBalances", expected_unlocked, unlocked, lp_index)
+        for bidder_index, expected in enumerate(recorded.bidders):
+            self._check(round_index, state, "ethBalancesBidders", expected, self.wallets[bidder_index], bidder_index)
+        if recorded.vault_locked is not None:
+            locked, unlocked = self._locked_unlocked(self.vault.total_collateral(), self.vault.total_unallocated_liquidity())
+            self._check(round_index, state, "vaultLocked", recorded.vault_locked, locked)
+            self._check(round_index, state, "vaultUnlocked", recorded.vault_unlocked, unlocked)
+
+    def _deposit(self, recorded: RecordedState, previous: Optional[RecordedState]):
+        vault = self.vault
+        for lp_index, unlocked in enumerate(recorded.lp_unlocked):
+            amount = unlocked - (previous.lp_unlocked[lp_index] if previous else 0)
+            if amount <= 0:
+                continue
+            self.blockchain.set_current_sender(f"lp{lp_index}")
+            if self.lp_positions[lp_index] is None:
+                self.lp_positions[lp_index] = vault.open_liquidity_position(amount)
+            else:
+                vault.deposit_liquidity_to(self.lp_positions[lp_index], amount)
+
+    def _start_round(self, recorded_round: RecordedRound):
+        vault = self.vault
+        feed = self.market_feed
+        feed.set_prev_month_avg_basefee(recorded_round.strike_price)
+        feed.set_prev_month_std_dev(recorded_round.strike_price * recorded_round.volatility // 10000)
+        feed.set_current_month_avg_basefee(recorded_round.settlement_price)
+        if vault.current_round_id is None:
+            self.blockchain.set_current_time(recorded_round.starting_timestamp)
+        else:
+            vault.advance_to_next_event()
+        self.round_parameters.recorded_round = recorded_round
+        vault.start_new_option_round()
+
+    def _place_bids(self, recorded: RecordedState, before: RecordedState, reserve_price: int):
+        for bidder_index, balance in enumerate(recorded.bidders):
+            amount = before.bidders[bidder_index] - balance
+            if amount <= 0:
+                continue
+            self.blockchain.set_current_sender(self.bidders[bidder_index])
+            self.vault.auction_place_bid(amount, reserve_price)
+            self.wallets[bidder_index] -= amount
+
+    def _settle_auction(self):
+        vault = self.vault
+        current_round = vault.fetch_current_round()
+        self.blockchain.set_current_time(current_round.auction_end_time)
+        if current_round.bids:
+            vault.settle_auction()
+        for bidder_index, bidder in enumerate(self.bidders):
+            self.wallets[bidder_index] += vault.unused_bid_deposit_balance_of(vault.current_round_id, bidder)
+            if bidder in current_round.refunds:
+                vault.refund_unused_bid_deposit(vault.current_round_id, bidder)
+
+    @staticmethod
+    def _recorded_withdrawals(running: RecordedState, settled: RecordedState) -> List[int]:
+        """
+        Withdrawals made right after settlement, from recorded values only: each LP's running balance less its
+        share of the payout (what the bidders gained by exercising, split by locked balance), minus its
+        recorded settled balance.
+        """
+        total_payout = max(sum(settled.bidders) - sum(running.bidders), 0)
+        total_locked = sum(running.lp_locked)
+        withdrawals = []
+        for locked, unlocked, settled_unlocked in zip(running.lp_locked, running.lp_unlocked, settled.lp_unlocked):
+            payout = total_payout * locked // total_locked if total_locked else 0
+            withdrawals.append(max(locked + unlocked - payout - settled_unlocked, 0))
+        return withdrawals
+
+    def _settle_round(self, running: RecordedState, settled: RecordedState):
+        vault = self.vault
+        current_round = vault.fetch_current_round()
+        self.blockchain.set_current_time(current_round.option_settlement_time)
+        vault.settle_option_round()
+
+        for lp_index, amount in enumerate(self._recorded_withdrawals(running, settled)):
+            position_id = self.lp_positions[lp_index]
+            if position_id is None or amount <= 0:
+                continue
+            # Withdrawals are inferred from rounded recorded balances; never ask for more than the position holds.
+            amount = min(amount, vault.collateral_balance_of(position_id))
+            if amount > 0:
+                vault.withdraw_liquidity(position_id, amount)
+
+        for bidder_index, bidder in enumerate(self.bidders):
+            if bidder in current_round.option_allocations:
+                self.wallets[bidder_index] += vault.claim_option_payout(vault.current_round_id, bidder)
+
+    def run(self) -> ScenarioResult:
+        result = self.result
+        previous_settled = None
+        for round_index, recorded_round in enumerate(self.rounds):
+            states = recorded_round.states
+            step = "openStateData"
+            try:
+                self._deposit(states[step], previous_settled)
+                self._compare_state(round_index, step, states[step])
+
+                step = "auctioningStateData"
+                self._start_round(recorded_round)
+                self._place_bids(states[step], states["openStateData"], recorded_round.reserve_price)
+                self._compare_state(round_index, step, states[step])
+
+                step = "runningStateData"
+                self._settle_auction()
+                current_round = self.vault.fetch_current_round()
+                if recorded_round.options_sold is not None:
+                    self._check(round_index, step, "optionsSold", recorded_round.options_sold, current_round.total_options_sold or 0)
+                self._compare_state(round_index, step, states[step])
+
+                step = "settledStateData"
+                self._settle_round(states["runningStateData"], states[step])
+                self._compare_state(round_index, step, states[step])
+            except Exception as e:
+                result.error = f"round {round_index} {step}: {e}"
+                break
+            result.rounds_checked += 1
+            previous_settled = states["settledStateData"]
+        return result
+
+
+def run_scenario(path: str, market_data: List[Dict], rtol: float = 1e-9, atol: float = 1.0) -> ScenarioResult:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            rounds = load_scenario(path, market_data)
+        except (OSError, KeyError, ValueError) as e:
+            result = ScenarioResult(path)
+            result.error = f"could not load: {e}"
+            return result
+        return ScenarioReplay(path, rounds, rtol, atol).run()
+
+
+def _run_scenario_args(args) -> ScenarioResult:
+    return run_scenario(*args)
+
+
+def run_differential(paths: Sequence[str] = DEFAULT_SCENARIO_PATHS, market_data_path: str = DEFAULT_MARKET_DATA,
+                     workers: Optional[int] = None, rtol: float = 1e-9, atol: float = 1.0) -> DifferentialReport:
+    """
+    Replay every recorded scenario under `paths` (files or directories of JSON recordings) and diff it.
+
+    :param workers: Worker processes; defaults to one per CPU. With 1 the scenarios run in this process.
+    :param rtol: Relative tolerance, since the reference model keeps wei amounts as floats.
+    :param atol: Absolute tolerance in wei.
+    """
+    market_data = load_market_data(market_data_path)
+    scenario_paths = find_scenarios(paths)
+    jobs = [(path, market_data, rtol, atol) for path in scenario_paths]
+    if workers == 1 or len(jobs) <= 1:
+        return DifferentialReport([_run_scenario_args(job) for job in jobs])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return DifferentialReport(list(executor.map(_run_scenario_args, jobs, chunksize=max(1, len(jobs) // 64))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff the reference Vault against recorded TS simulation outputs.")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_SCENARIO_PATHS, help="Recordings, or directories of them.")
+    parser.add_argument("--market-data", default=DEFAULT_MARKET_DATA)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1.0)
+    parser.add_argument("--max-mismatches", type=int, default=10, help="Mismatches listed per scenario.")
+    args = parser.parse_args()
+
+    report = run_differential(args.paths, args.market_data, args.workers, args.rtol, args.atol)
+    print(report.summary(args.max_mismatches))
+    raise SystemExit(0 if report.ok else 1)
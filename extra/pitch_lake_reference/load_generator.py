@@ -0,0 +1,253 @@
+import contextlib
+import csv
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from pitch_lake_reference import RoundState, Vault, VaultRejection
+
+
+class ActionType:
+    OPEN_POSITION = "open"
+    DEPOSIT = "deposit"
+    WITHDRAW = "withdraw"
+    PLACE_BID = "bid"
+    # Round transitions, recorded so that a log replays whole rounds.
+    START_ROUND = "start_round"
+    SETTLE_ROUND = "settle_round"
+
+
+# (action type, sender, position index, amount in wei, price in wei)
+# The position index is the sender's n-th opened position, resolved to a vault position ID when
+# the action is applied, so a log replays against any vault.
+Action = Tuple[str, str, int, int, int]
+
+
+class LPBehavior:
+    def __init__(self, open_weight: float = 0.2, deposit_weight: float = 0.6, withdraw_weight: float = 0.2,
+                 median_amount: int = 10 * 10**18, amount_sigma: float = 1.0, withdraw_fraction: float = 0.25):
+        self.open_weight = open_weight
+        self.deposit_weight = deposit_weight
+        self.withdraw_weight = withdraw_weight
+        self.median_amount = median_amount  # deposits are log-normal around this, in wei
+        self.amount_sigma = amount_sigma
+        self.withdraw_fraction = withdraw_fraction  # withdrawals are this fraction of a typical deposit
+
+
+class BidderBehavior:
+    def __init__(self, valuation_multiple: float = 1.5, valuation_sigma: float = 0.5, shading_low: float = 0.7,
+                 shading_high: float = 1.0, median_units: int = 10, units_sigma: float = 1.0):
+        self.valuation_multiple = valuation_multiple  # median valuation as a multiple of the reserve price
+        self.valuation_sigma = valuation_sigma
+        self.shading_low = shading_low  # bidders bid a uniform fraction of their valuation...
+        self.shading_high = shading_high
+        self.median_units = median_units  # ...for a log-normal number of options
+        self.units_sigma = units_sigma
+
+
+class LoadGenerator:
+    """
+    Seeded agent-based generator of LP and bidder actions.
+
+    LPs choose between opening, topping up and withdrawing from their own positions. Bidders draw a
+    private valuation around the round's reserve price, shade it, and stay out of the auction when
+    the shaded price falls below the reserve.
+    """
+
+    def __init__(self, seed: int, num_lps: int, num_bidders: int, lp_behavior: LPBehavior = None,
+                 bidder_behavior: BidderBehavior = None, min_deposit: int = int(0.1 * 10**18)):
+        self.rng = np.random.default_rng(seed)
+        self.num_lps = num_lps
+        self.num_bidders = num_bidders
+        self.lp_behavior = lp_behavior if lp_behavior else LPBehavior()
+        self.bidder_behavior = bidder_behavior if bidder_behavior else BidderBehavior()
+        self.min_deposit = min_deposit
+        self.positions_opened = [0] * num_lps
+
+    def lp_actions(self, count: int) -> List[Action]:
+        behavior = self.lp_behavior
+        weights = np.array([behavior.open_weight, behavior.deposit_weight, behavior.withdraw_weight])
+        kinds = self.rng.choice(3, size=count, p=weights / weights.sum())
+        agents = self.rng.integers(self.num_lps, size=count)
+        amounts = self.rng.lognormal(math.log(behavior.median_amount), behavior.amount_sigma, size=count)
+        picks = self.rng.random(count)
+
+        actions = []
+        positions_opened = self.positions_opened
+        for kind, agent, amount, pick in zip(kinds.tolist(), agents.tolist(), amounts.tolist(), picks.tolist()):
+            sender = f"lp{agent}"
+            opened = positions_opened[agent]
+            if kind == 0 or opened == 0:
+                actions.append((ActionType.OPEN_POSITION, sender, opened, max(int(amount), self.min_deposit), 0))
+                positions_opened[agent] = opened + 1
+            elif kind == 1:
+                actions.append((ActionType.DEPOSIT, sender, int(pick * opened), int(amount), 0))
+            else:
+                actions.append((ActionType.WITHDRAW, sender, int(pick * opened), int(amount * behavior.withdraw_fraction), 0))
+        return actions
+
+    def bid_actions(self, count: int, reserve_price) -> List[Action]:
+        """
+        Draw `count` bidder arrivals against `reserve_price`; bidders priced out by the reserve abstain.
+        """
+        behavior = self.bidder_behavior
+        reserve_price = max(int(reserve_price), 1)
+        valuations = reserve_price * self.rng.lognormal(math.log(behavior.valuation_multiple), behavior.valuation_sigma, size=count)
+        prices = valuations * self.rng.uniform(behavior.shading_low, behavior.shading_high, size=count)
+        units = np.maximum(1, self.rng.lognormal(math.log(behavior.median_units), behavior.units_sigma, size=count).astype(np.int64))
+        bidders = self.rng.integers(self.num_bidders, size=count)
+
+        actions = []
+        for bidder, price, num_units in zip(bidders.tolist(), prices.tolist(), units.tolist()):
+            price = int(price)
+            if price < reserve_price:
+                continue
+            actions.append((ActionType.PLACE_BID, f"bidder{bidder}", 0, num_units * price, price))
+        return actions
+
+
+LOG_HEADER = ["action", "sender", "position_index", "amount", "price"]
+
+
+def write_action_log(path: str, actions: Iterable[Action]):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        writer.writerows(actions)
+
+
+def read_action_log(path: str) -> Iterator[Action]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for action, sender, position_index, amount, price in reader:
+            yield action, sender, int(position_index), int(amount), int(price)
+
+
+class ThroughputReport:
+    def __init__(self):
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)  # raised, or returned False
+        self.elapsed_ns: Dict[str, int] = defaultdict(int)
+
+    def ops_per_second(self, action: str) -> float:
+        elapsed = self.elapsed_ns.get(action, 0)
+        return self.counts[action] / (elapsed / 1e9) if elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [f"{'action':<14}{'count':>12}{'rejected':>12}{'ops/sec':>14}"]
+        for action in sorted(self.counts):
+            lines.append(f"{action:<14}{self.counts[action]:>12}{self.rejected[action]:>12}{self.ops_per_second(action):>14.0f}")
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def _silenced():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class LoadDriver:
+    """
+    Applies actions to a vault through its public entry points and times each call.
+    """
+
+    def __init__(self, vault: Vault, quiet: bool = True):
+        self.vault = vault
+        self.quiet = quiet  # the reference model prints on every call; keep that out of the timings
+        self.positions: Dict[str, List[int]] = defaultdict(list)  # sender -> vault position IDs, in open order
+        self.report = ThroughputReport()
+
+    def _start_round(self):
+        vault = self.vault
+        vault.advance_to_next_event()
+        _, params = vault.start_new_option_round()
+        # Bids arrive while the auction is open.
+        vault.blockchain.set_current_time(params.auction_end_time - 1)
+
+    def _settle_round(self):
+        vault = self.vault
+        blockchain = vault.blockchain
+        current_round = vault.fetch_current_round()
+        if current_round.state != RoundState.AUCTION_STARTED:
+            # Reject before touching the clock, e.g. when the round's start was itself rejected.
+            raise VaultRejection(f"Round {vault.current_round_id} is not running.")
+        blockchain.set_current_time(current_round.auction_end_time)
+        if current_round.bids:
+            vault.settle_auction()
+        blockchain.set_current_time(current_round.option_settlement_time)
+        vault.settle_option_round()
+
+    def _apply(self, action: Action) -> bool:
+        kind, sender, position_index, amount, price = action
+        vault = self.vault
+        if kind == ActionType.START_ROUND:
+            self._start_round()
+            return True
+        if kind == ActionType.SETTLE_ROUND:
+            self._settle_round()
+            return True
+        vault.blockchain.set_current_sender(sender)
+        if kind == ActionType.PLACE_BID:
+            vault.auction_place_bid(amount, price)
+            return True
+        if kind == ActionType.OPEN_POSITION:
+            self.positions[sender].append(vault.open_liquidity_position(amount))
+            return True
+        positions = self.positions.get(sender)
+        if not positions or position_index >= len(positions):
+            return False
+        if kind == ActionType.DEPOSIT:
+            vault.deposit_liquidity_to(positions[position_index], amount)
+            return True
+        if kind == ActionType.WITHDRAW:
+            return vault.withdraw_liquidity(positions[position_index], amount)
+        raise ValueError(f"Unknown action {kind}.")
+
+    def apply(self, actions: Iterable[Action]) -> ThroughputReport:
+        report = self.report
+        perf_counter_ns = time.perf_counter_ns
+        with contextlib.ExitStack() as stack:
+            if self.quiet:
+                stack.enter_context(_silenced())
+            for action in actions:
+                kind = action[0]
+                start = perf_counter_ns()
+                # A VaultRejection, round transitions included, is counted as a rejected action; any other
+                # exception is a bug and propagates.
+                try:
+                    accepted = self._apply(action)
+                except VaultRejection:
+                    accepted = False
+                report.elapsed_ns[kind] += perf_counter_ns() - start
+                report.counts[kind] += 1
+                if not accepted:
+                    report.rejected[kind] += 1
+        return report
+
+    def run_round(self, generator: LoadGenerator, lp_actions: int, bid_actions: int, log_path: str = None) -> ThroughputReport:
+        """
+        One simulated round: LP traffic before the round opens, bidder traffic during its auction, then settlement.
+
+        :param log_path: If set, the round's actions are appended to this action log for replay with `apply`.
+        """
+        opening = generator.lp_actions(lp_actions)
+        opening.append((ActionType.START_ROUND, "", 0, 0, 0))
+        self.apply(opening)
+        closing = generator.bid_actions(bid_actions, self.vault.fetch_current_round().reserve_price)
+        closing.append((ActionType.SETTLE_ROUND, "", 0, 0, 0))
+        self.apply(closing)
+
+        if log_path:
+            new_log = not os.path.exists(log_path)
+            with open(log_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_log:
+                    writer.writerow(LOG_HEADER)
+                writer.writerows(opening)
+                writer.writerows(closing)
+        return self.report
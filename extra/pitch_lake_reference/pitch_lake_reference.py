@@ -1,12 +1,18 @@
 import uuid
 import threading
 from eth_typing import Address
-from datetime import timedelta, datetime
-from typing import Dict, List, Optional, Any, Protocol, Tuple
+from typing import Dict, Hashable, List, Optional, Any, Protocol, Tuple
 import math
+from collections import OrderedDict
+import heapq
+import numpy as np
 from scipy.stats import norm
 
 
+SECONDS_PER_DAY = 24 * 60 * 60
+GENESIS_TIME = 0  # Simulated clocks start here, so runs never depend on the wall clock
+
+
 class Blockchain:
     _instance = None
     _lock = threading.Lock()
@@ -16,13 +22,28 @@ class Blockchain:
             if cls._instance is None:
                 cls._instance = super(Blockchain, cls).__new__(cls)
                 # Initialize the blockchain state
-                cls._instance.current_time = datetime.utcnow()
+                cls._instance.current_time = GENESIS_TIME  # Integer timestamp in seconds
                 cls._instance.current_sender = None
         return cls._instance
 
-    def set_current_time(self, new_time: datetime):
+    def set_current_time(self, new_time: int):
         self.current_time = new_time
 
+    def advance_to(self, timestamp: int) -> int:
+        """
+        Move the clock forward to `timestamp`. Unlike set_current_time, it never moves backwards.
+        """
+        if timestamp < self.current_time:
+            raise ValueError(f"Cannot move the clock back from {self.current_time} to {timestamp}.")
+        self.current_time = timestamp
+        return self.current_time
+
+    def advance_by(self, seconds: int) -> int:
+        if seconds < 0:
+            raise ValueError("Cannot move the clock backwards.")
+        self.current_time += seconds
+        return self.current_time
+
     def set_current_sender(self, sender):
         self.current_sender = sender
 
@@ -69,28 +90,49 @@ class StrikePriceStrategy:
     def __init__(self, market_aggregator):
         self.market_aggregator = market_aggregator
 
-    def calculate(self):
+    def strike_price(self, base_fee, std_dev):
+        """
+        The strike price as a pure function of the previous month's average basefee and standard deviation.
+        """
         raise NotImplementedError("You should implement this method")
 
+    def cache_key(self) -> Hashable:
+        """
+        What RoundParameterCache keys this strategy's entries on: strategies with equal keys must give the same
+        strike price for the same market window. Defaults to the instance itself, so no two strategies share
+        entries by accident; strategies whose strike_price uses no attributes return their class instead.
+        """
+        return self
 
-class InTheMoneyStrategy(StrikePriceStrategy):
     def calculate(self):
         base_fee = self.market_aggregator.get_prev_month_avg_basefee()
         std_dev = self.market_aggregator.get_prev_month_std_dev()
+        return self.strike_price(base_fee, std_dev)
+
+
+class InTheMoneyStrategy(StrikePriceStrategy):
+    def strike_price(self, base_fee, std_dev):
         return base_fee + std_dev
 
+    def cache_key(self) -> Hashable:
+        return type(self)
+
 
 class AtTheMoneyStrategy(StrikePriceStrategy):
-    def calculate(self):
-        return self.market_aggregator.get_prev_month_avg_basefee()
+    def strike_price(self, base_fee, std_dev):
+        return base_fee
+
+    def cache_key(self) -> Hashable:
+        return type(self)
 
 
 class OutOfTheMoneyStrategy(StrikePriceStrategy):
-    def calculate(self):
-        base_fee = self.market_aggregator.get_prev_month_avg_basefee()
-        std_dev = self.market_aggregator.get_prev_month_std_dev()
+    def strike_price(self, base_fee, std_dev):
         return base_fee - std_dev
 
+    def cache_key(self) -> Hashable:
+        return type(self)
+
 class RoundState:
     INITIALIZED = 0
     AUCTION_STARTED = 1
@@ -112,7 +154,8 @@ class OptionRoundParams:
                  auction_end_time: int, 
                  minimum_bid_amount: int, 
                  minimum_collateral_required: int,
-                    total_collateral: int
+                    total_collateral: int,
+                 prev_month_avg_basefee: Optional[int] = None
                  ):
         self.current_average_basefee = current_average_basefee  # in wei
         self.standard_deviation = standard_deviation
@@ -128,6 +171,8 @@ class OptionRoundParams:
         self.minimum_bid_amount = minimum_bid_amount  # to prevent a DoS vector
         self.minimum_collateral_required = minimum_collateral_required  # round won't start until this much collateral
         self.total_collateral = total_collateral  # total collateral in the round
+        # The market window the round was priced from; standard_deviation is that window's as well.
+        self.prev_month_avg_basefee = prev_month_avg_basefee  # in wei
         
 
 
@@ -156,7 +201,8 @@ class IVault(Protocol):
         ...
 
     # amount is in wei and its the total amount that the user is willing to pay for the options. price is the max price per option
-    def auction_place_bid(self, amount: int, price: int) -> bool:
+    # returns the new bid's ID
+    def auction_place_bid(self, amount: int, price: int) -> int:
         ...
 
     def settle_auction(self) -> int:
@@ -222,18 +268,330 @@ class IVault(Protocol):
     def decimals(self) -> int:  # Python equivalent of u8 is int
         ...
 
+class VaultRejection(ValueError):
+    """
+    Raised when a vault entry point rejects a request: an amount below a minimum, a call in the wrong round
+    state or before its time, an unknown round or position. Any other exception from the vault is a bug.
+    """
+
+
 class VaultConfig:
     # Configuration parameters with their default values.
-    ROUND_DURATION: timedelta = timedelta(days=25)
-    AUCTION_DURATION: timedelta = timedelta(days=15)
-    SETTLEMENT_INTERVAL: timedelta = timedelta(days=5) # time between option settlement and next round start
+    # Durations are in seconds, like the blockchain's timestamps.
+    ROUND_DURATION: int = 25 * SECONDS_PER_DAY
+    AUCTION_DURATION: int = 15 * SECONDS_PER_DAY
+    SETTLEMENT_INTERVAL: int = 5 * SECONDS_PER_DAY # time between option settlement and next round start
     MIN_BID_AMOUNT: int = int(0.5 * 10 ** 18)  # 0.5 ETH in Wei
     MIN_DEPOSIT_AMOUNT: int = int(0.1 * 10 ** 18)  # 0.1 ETH in Wei
     MIN_COLLATERAL: int = 10 ** 18  # 1 ETH in Wei
 
-class RoundPositionEntry:
-    def __init__(self, amount):
-        self.amount = amount
+class ClaimStatus:
+    OK = 0
+    INVALID_ROUND = 1
+    ROUND_NOT_SETTLED = 2
+    NO_ENTRY = 3
+
+
+class BatchClaimEntry:
+    def __init__(self, round_id, recipient, amount, status):
+        self.round_id = round_id
+        self.recipient = recipient  # None when a whole round was requested and could not be claimed
+        self.amount = amount  # in wei, 0 unless status is ClaimStatus.OK
+        self.status = status
+
+
+class RoundParameters:
+    def __init__(self, strike_price, cap_level, collateral_level, max_payout_per_option, total_options_forsale, reserve_price):
+        self.strike_price = strike_price  # in wei
+        self.cap_level = cap_level  # in wei
+        self.collateral_level = collateral_level  # payout in wei per Gwei of price difference
+        self.max_payout_per_option = max_payout_per_option  # in wei
+        self.total_options_forsale = total_options_forsale
+        self.reserve_price = reserve_price  # in wei
+
+
+def derive_round_parameters(strike_price, prev_month_avg_basefee, prev_month_std_dev, total_collateral) -> RoundParameters:
+    """
+    Derive a round's parameters from its strike price, the previous month's market data and its collateral.
+
+    Pure: the same inputs always give the same parameters, which is what lets RoundParameterCache reuse them.
+    """
+    cap_level = prev_month_avg_basefee + (3 * prev_month_std_dev)
+    # Convert the cap_level and strike_price from wei to Gwei for the calculations.
+    cap_level_gwei = cap_level // 1e9  # Convert from wei to Gwei
+    strike_price_gwei = strike_price // 1e9  # Convert from wei to Gwei
+    # The collateral_level represents the maximum payout per option in wei.
+    collateral_level = 1e18  # 1 ETH in wei, since the payout is 1 ETH per Gwei difference
+
+    # Calculate the price difference limit in Gwei.
+    price_difference_limit = cap_level_gwei - strike_price_gwei
+
+    # Calculate the maximum payout in wei for one option.
+    # This is the payout per Gwei difference times the maximum Gwei difference.
+    max_payout_per_option = collateral_level * price_difference_limit
+
+    # Calculate the total number of options that the total collateral can support.
+    # This is the total collateral divided by the maximum payout for one option.
+    total_options_forsale = total_collateral // max_payout_per_option  # Floor division for whole options
+    reserve_price = prev_month_std_dev * 2  # just an assumption
+
+    return RoundParameters(strike_price, cap_level, collateral_level, max_payout_per_option, total_options_forsale, reserve_price)
+
+
+class RoundParameterCache:
+    """
+    LRU cache of derived round parameters keyed by (strategy.cache_key(), market window, collateral).
+
+    Sweeps that open many rounds on identical inputs share one cache and skip the derivation.
+    Strategies that only override `calculate` are not pure functions of the market window and bypass the cache.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[tuple, RoundParameters]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_derive(self, strategy: StrikePriceStrategy, prev_month_avg_basefee, prev_month_std_dev, total_collateral) -> RoundParameters:
+        if type(strategy).strike_price is StrikePriceStrategy.strike_price:
+            self.misses += 1
+            return derive_round_parameters(strategy.calculate(), prev_month_avg_basefee, prev_month_std_dev, total_collateral)
+
+        key = (strategy.cache_key(), prev_month_avg_basefee, prev_month_std_dev, total_collateral)
+        params = self.entries.get(key)
+        if params is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return params
+
+        self.misses += 1
+        params = derive_round_parameters(strategy.strike_price(prev_month_avg_basefee, prev_month_std_dev),
+                                         prev_month_avg_basefee, prev_month_std_dev, total_collateral)
+        self.entries[key] = params
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return params
+
+    def evict(self, strategy: StrikePriceStrategy, prev_month_avg_basefee, prev_month_std_dev, total_collateral) -> bool:
+        """
+        Drop one entry. Returns whether it was cached.
+        """
+        return self.entries.pop((strategy.cache_key(), prev_month_avg_basefee, prev_month_std_dev, total_collateral), None) is not None
+
+    def clear(self):
+        self.entries.clear()
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
+
+
+# Shared by every vault unless one is given its own, so sweeps across many vaults reuse derivations. Entries are
+# only shared between strategies with equal cache keys.
+DEFAULT_ROUND_PARAMETER_CACHE = RoundParameterCache()
+
+
+class RoundPositionStore:
+    """
+    Liquidity per (round, position), stored as one dense list per open round indexed by position ID.
+
+    When a round settles its list is folded into `rolled_balances`, a single column holding every
+    position's balance carried out of the last settled round, and then dropped. Memory therefore
+    scales with live positions, not positions x rounds.
+
+    A position's balance entering round r is `rolled_balances[p] + amount(r, p)` once every round
+    before r has been compacted.
+
+    Column totals are kept alongside the columns so vault-wide totals are O(1) reads.
+    """
+
+    def __init__(self):
+        self.rounds: Dict[int, List[int]] = {}  # round_id -> amounts indexed by position ID
+        self.round_totals: Dict[int, int] = {}  # round_id -> sum of the round's column
+        self.rolled_balances: List[int] = []  # indexed by position ID
+        self.rolled_total = 0
+        self.premium_balances: List[int] = []  # premiums earned so far, already part of the rolled balances
+        self.premium_total = 0
+        self.compacted_through: int = -1  # last round folded into rolled_balances
+
+    def open_round(self, round_id: int):
+        self.rounds[round_id] = []
+        self.round_totals[round_id] = 0
+
+    @staticmethod
+    def _grow(column: list, position_id: int):
+        if position_id >= len(column):
+            column.extend([0] * (position_id + 1 - len(column)))
+
+    def amount(self, round_id: int, position_id: int):
+        column = self.rounds.get(round_id)
+        if column is None or position_id >= len(column):
+            return 0
+        return column[position_id]
+
+    def add(self, round_id: int, position_id: int, amount):
+        column = self.rounds[round_id]
+        self._grow(column, position_id)
+        column[position_id] += amount
+        self.round_totals[round_id] += amount
+
+    def round_total(self, round_id: int):
+        return self.round_totals.get(round_id, 0)
+
+    def rolled_balance(self, position_id: int):
+        rolled = self.rolled_balances
+        return rolled[position_id] if position_id < len(rolled) else 0
+
+    def add_rolled(self, position_id: int, amount):
+        self._grow(self.rolled_balances, position_id)
+        self.rolled_balances[position_id] += amount
+        self.rolled_total += amount
+
+    def premium_balance(self, position_id: int):
+        premiums = self.premium_balances
+        return premiums[position_id] if position_id < len(premiums) else 0
+
+    def balance_entering(self, round_id: int, position_id: int):
+        return self.rolled_balance(position_id) + self.amount(round_id, position_id)
+
+    @staticmethod
+    def _pro_rata(balances: np.ndarray, total, amount: int) -> np.ndarray:
+        """
+        Split `amount` wei in proportion to `balances`, which add up to `total`, in exact integer arithmetic.
+
+        Every share is rounded down, and the wei left over (fewer than the number of positions) go one each to
+        the largest remainders, compared as float64 with ties to the lowest position ID, so the shares add up to
+        `amount` exactly.
+        """
+        if amount == total:
+            return balances.copy()
+        if amount == 0:
+            return np.zeros(len(balances), dtype=object)
+        scaled = balances * amount
+        shares = scaled // total
+        leftover = amount - int(shares.sum())
+        if leftover:
+            remainders = (scaled - shares * total).astype(np.float64)
+            shares[np.argsort(-remainders, kind="stable")[:leftover]] += 1
+        return shares
+
+    def compact(self, round_id: int, total_collateral_initial, total_collateral_at_settlement, total_premiums) -> int:
+        """
+        Fold a settled round into the rolled balances in one vectorized pass.
+
+        Each position's share of the round is its balance over `total_collateral_initial`. The position keeps that
+        share of the collateral left after the payout plus that share of the premiums, and the sum rolls forward as
+        its balance entering the next round. Amounts are whole wei; see _pro_rata.
+
+        :return: The collateral rolled forward, which is what the next round receives.
+        """
+        if round_id != self.compacted_through + 1:
+            raise ValueError(f"Rounds must be compacted in order; expected round {self.compacted_through + 1}.")
+        column = self.rounds.pop(round_id, [])
+        self.round_totals.pop(round_id, None)
+        remaining = int(total_collateral_at_settlement)
+        premiums = int(total_premiums)
+        size = max(len(column), len(self.rolled_balances), len(self.premium_balances))
+        balances = np.zeros(size, dtype=object)
+        balances[:len(self.rolled_balances)] = [int(balance) for balance in self.rolled_balances]
+        balances[:len(column)] += np.array([int(amount) for amount in column], dtype=object)
+        if int(balances.sum()) != int(total_collateral_initial):
+            raise ValueError(f"Position balances in round {round_id} add up to {balances.sum()}, "
+                             f"not the round's collateral {total_collateral_initial}.")
+
+        if total_collateral_initial:
+            credited = self._pro_rata(balances, int(total_collateral_initial), premiums)
+            balances = self._pro_rata(balances, int(total_collateral_initial), remaining) + credited
+            if premiums:
+                premium_balances = np.zeros(size, dtype=object)
+                premium_balances[:len(self.premium_balances)] = self.premium_balances
+                self.premium_balances = (premium_balances + credited).tolist()
+            self.premium_total += premiums
+        self.rolled_balances = balances.tolist()
+        self.rolled_total = remaining + premiums if total_collateral_initial else int(balances.sum())
+        self.compacted_through = round_id
+        return self.rolled_total
+
+    def iter_entries(self):
+        """
+        Yield (round_id, position_id, amount) for every non-zero balance. Rolled balances are reported
+        against the last compacted round.
+        """
+        for position_id, balance in enumerate(self.rolled_balances):
+            if balance:
+                yield self.compacted_through, position_id, balance
+        for round_id in sorted(self.rounds):
+            for position_id, amount in enumerate(self.rounds[round_id]):
+                if amount:
+                    yield round_id, position_id, amount
+
+
+class RunningClearingPrice:
+    """
+    Indicative clearing price of an open auction, kept up to date as each bid arrives.
+
+    Demand at a price p is counted as the wei bid at or above p divided by p. Once that covers the options
+    for sale, the indicative price is the highest bid price where it still does; before then it is the
+    lowest bid price, as in settle_auction. Demand only grows during an auction, so once covered the price
+    only moves up, and each price level leaves the heap at most once: O(log n) amortized per bid.
+
+    settle_auction counts whole options per bid (size // p), so the price it finds can be lower than the
+    indicative one when rounding down decides the level.
+    """
+
+    def __init__(self, total_options_forsale):
+        self.total_options_forsale = total_options_forsale
+        self.price = None  # indicative clearing price in wei, None before the first bid
+        self.covered = False  # whether demand at `price` covers the options for sale
+        self._prices: List = []  # min-heap of the distinct bid prices at or above `price`
+        self._level_sizes: Dict[Any, Any] = {}  # price -> wei bid at that price
+        self._active_size = 0  # wei bid at or above `price`
+
+    @property
+    def options_covered(self):
+        return self._active_size / self.price if self.price else 0
+
+    def add_bid(self, price, size):
+        if self.price is None or (not self.covered and price < self.price):
+            self.price = price
+        if price < self.price:
+            return  # below a covered clearing price; it can never count again
+        if price in self._level_sizes:
+            self._level_sizes[price] += size
+        else:
+            self._level_sizes[price] = size
+            heapq.heappush(self._prices, price)
+        self._active_size += size
+
+        if not self.covered:
+            if self._active_size / self.price < self.total_options_forsale:
+                return
+            self.covered = True
+
+        # Drop the lowest price level while the next one up still covers the options for sale.
+        prices = self._prices
+        while len(prices) > 1:
+            lowest = prices[0]
+            next_price = prices[1] if len(prices) == 2 else min(prices[1], prices[2])
+            remaining = self._active_size - self._level_sizes[lowest]
+            if remaining / next_price < self.total_options_forsale:
+                break
+            heapq.heappop(prices)
+            del self._level_sizes[lowest]
+            self._active_size = remaining
+        self.price = prices[0]
 
 
 class LiquidityPosition:
@@ -261,10 +619,10 @@ class Round:
         self.payout_amount_per_option = 0
         
         # Timing parameters
-        self.round_start_time: Optional[datetime] = None
-        self.auction_start_time: Optional[datetime] = None
-        self.auction_end_time: Optional[datetime] = None
-        self.option_settlement_time: Optional[datetime] = None
+        self.round_start_time: Optional[int] = None
+        self.auction_start_time: Optional[int] = None
+        self.auction_end_time: Optional[int] = None
+        self.option_settlement_time: Optional[int] = None
 
         # Initialize parameters specific to the round
         self.cap_level = None
@@ -274,7 +632,10 @@ class Round:
         self.total_options_sold = None
         self.reserve_price = None
         self.max_payout_per_option = None
-        self.bids: List[Dict[str, int]] = []  # List of bids. Each bid is a dictionary.
+        self.bids: List[Dict[str, int]] = []  # List of bids in arrival (bid ID) order. Each bid is a dictionary.
+        self.bid_options: List[int] = []  # Options allocated to each bid, aligned with bids
+        self.bid_refunds: List[int] = []  # Refund in wei owed on each bid, aligned with bids
+        self.running_clearing_price: Optional[RunningClearingPrice] = None  # Created with the auction's first bid
         self.option_allocations = {}  # Records the number of options each bidder receives
         self.refunds = {}  # Records the refund amounts in wei
         self.auction_clearing_price = None
@@ -284,13 +645,16 @@ class Round:
 
 # The Vault implementation maintains a record of all open liquidity positions/tokens.
 class Vault(IVault):
-    def __init__(self, strike_price_strategy: StrikePriceStrategy, blockchain: Blockchain, market_aggregator: MarketAggregator, config: Optional[VaultConfig] = None):
+    def __init__(self, strike_price_strategy: StrikePriceStrategy, blockchain: Blockchain, market_aggregator: MarketAggregator, config: Optional[VaultConfig] = None,
+                 round_parameter_cache: Optional[RoundParameterCache] = None):
         self.config = config if config else VaultConfig()
+        self.round_parameter_cache = round_parameter_cache if round_parameter_cache else DEFAULT_ROUND_PARAMETER_CACHE
         self.blockchain = blockchain
         self.market_aggregator = market_aggregator
         self.strike_price_strategy = strike_price_strategy
         self.position_id = 0  # New attribute to keep track of the latest position ID
-        self.round_positions = {}  # Key: (round_id, position_id), Value: RoundPositionEntry
+        self.bid_id = 0  # Next bid ID; bid IDs increase across every round of the vault
+        self.round_positions = RoundPositionStore()
 
 
         self.liquidity_positions: Dict[int, LiquidityPosition] = {}  # A record of all liquidity positions.
@@ -335,7 +699,7 @@ class Vault(IVault):
     def open_liquidity_position(self, amount: int) -> int:
         # Ensure the amount meets the minimum deposit requirement
         if amount < self.config.MIN_DEPOSIT_AMOUNT:
-            raise Exception("Deposit amount is below the minimum requirement.")
+            raise VaultRejection("Deposit amount is below the minimum requirement.")
 
         sender = self.blockchain.get_current_sender()
 
@@ -343,9 +707,8 @@ class Vault(IVault):
         new_position = LiquidityPosition(depositor=sender, position_id=self.position_id, round_id=self.next_round_id)
         self.liquidity_positions[self.position_id] = new_position
         
-        new_entry = RoundPositionEntry(amount)
-        # Create an entry in RoundPositions
-        self.round_positions[(self.next_round_id, self.position_id)] = new_entry
+        # Record the deposit against the next round.
+        self.round_positions.add(self.next_round_id, self.position_id, amount)
 
         # Update the total collateral for the next round.
         self.rounds[self.next_round_id].total_collateral_at_initialization += amount
@@ -359,7 +722,7 @@ class Vault(IVault):
         Starts a new option round if minimum collateral is met, changing the state of the round, and prepares the next round.
         """
         if self.next_round_id is None:
-            raise Exception("No round initialized yet.")
+            raise VaultRejection("No round initialized yet.")
 
         next_round = self.rounds[self.next_round_id]
 
@@ -367,37 +730,38 @@ class Vault(IVault):
         total_collateral = next_round.total_collateral_at_initialization
 
         if total_collateral < self.config.MIN_COLLATERAL:
-            raise Exception("Minimum collateral required to start a new option round not met.")
+            raise VaultRejection("Minimum collateral required to start a new option round not met.")
+
+        current_time = self.blockchain.get_current_time()
 
-        next_round.auction_start_time = datetime.utcnow()  # Or appropriate blockchain equivalent
+        # The previous round must be settled, and the settlement interval must have passed.
+        if self.current_round_id is not None:
+            current_round = self.rounds[self.current_round_id]
+            if current_round.state != RoundState.OPTION_SETTLED:
+                raise VaultRejection(f"Round {self.current_round_id} must be settled before a new round starts.")
+            if current_time < current_round.option_settlement_time + self.config.SETTLEMENT_INTERVAL:
+                raise VaultRejection("The settlement interval has not passed yet.")
+
+        next_round.auction_start_time = current_time
         next_round.state = RoundState.AUCTION_STARTED
 
         # Set auction_end_time based on auction duration from config
 
         next_round.auction_end_time = next_round.auction_start_time + self.config.AUCTION_DURATION
         next_round.option_settlement_time = next_round.auction_start_time + self.config.ROUND_DURATION
-        next_round.strike_price = self.strike_price_strategy.calculate()
-        next_round.cap_level = self.market_aggregator.get_prev_month_avg_basefee() + (3 * self.market_aggregator.get_prev_month_std_dev())
+        # Read the market window once; the derived parameters are a pure function of it.
+        prev_month_avg_basefee = self.market_aggregator.get_prev_month_avg_basefee()
+        prev_month_std_dev = self.market_aggregator.get_prev_month_std_dev()
+        round_parameters = self.round_parameter_cache.get_or_derive(self.strike_price_strategy, prev_month_avg_basefee, prev_month_std_dev, total_collateral)
+
+        next_round.strike_price = round_parameters.strike_price
+        next_round.cap_level = round_parameters.cap_level
+        next_round.collateral_level = round_parameters.collateral_level
+        next_round.max_payout_per_option = round_parameters.max_payout_per_option
+        next_round.total_options_forsale = round_parameters.total_options_forsale
+        next_round.reserve_price = round_parameters.reserve_price
         print(f"next_round.cap_level: {next_round.cap_level}") 
         print(f"next_round.strike_price: {next_round.strike_price}")
-        # Convert the cap_level and strike_price from wei to Gwei for the calculations.
-        cap_level_gwei = next_round.cap_level // 1e9  # Convert from wei to Gwei
-        strike_price_gwei = next_round.strike_price // 1e9  # Convert from wei to Gwei
-        # The collateral_level represents the maximum payout per option in wei.
-        next_round.collateral_level = 1e18  # 1 ETH in wei, since the payout is 1 ETH per Gwei difference
-
-        # Calculate the price difference limit in Gwei.
-        price_difference_limit = cap_level_gwei - strike_price_gwei
-        print(f"Price difference limit in Gwei: {price_difference_limit}")       
-
-        # Calculate the maximum payout in wei for one option.
-        # This is the payout per Gwei difference times the maximum Gwei difference.
-        next_round.max_payout_per_option = next_round.collateral_level * price_difference_limit
-
-        # Calculate the total number of options that the total collateral can support.
-        # This is the total collateral divided by the maximum payout for one option.
-        next_round.total_options_forsale = next_round.total_collateral_at_initialization // next_round.max_payout_per_option  # Floor division for whole options
-        next_round.reserve_price = self.market_aggregator.get_prev_month_std_dev() * 2 # just an assumption
 
         self.current_round_id = self.next_round_id
         self.next_round_id += 1
@@ -407,7 +771,7 @@ class Vault(IVault):
 
         # Gather the necessary data to return to the caller.
         current_average_basefee = self.market_aggregator.get_current_month_avg_basefee()
-        standard_deviation = self.market_aggregator.get_prev_month_std_dev()
+        standard_deviation = prev_month_std_dev
         strike_price = next_round.strike_price
         cap_level = next_round.cap_level
         collateral_level = next_round.collateral_level
@@ -432,7 +796,8 @@ class Vault(IVault):
             auction_end_time=auction_end_time,
             minimum_bid_amount=minimum_bid_amount,
             minimum_collateral_required=minimum_collateral_required,
-            total_collateral=total_collateral
+            total_collateral=total_collateral,
+            prev_month_avg_basefee=prev_month_avg_basefee
         )
 
         return self.current_round_id, self.rounds[self.current_round_id].option_round_params
@@ -442,16 +807,10 @@ class Vault(IVault):
         Deposit additional liquidity to an existing position.
         """
         if position_id not in self.liquidity_positions:
-            raise Exception("No liquidity position found with the provided ID.")
+            raise VaultRejection("No liquidity position found with the provided ID.")
 
-        liquidity_position = self.liquidity_positions[position_id]
-        round_id = liquidity_position.round_id  # retrieve the round_id from the position instance
-        
-        if round_position := self.round_positions.get((round_id, position_id)):
-            round_position.amount += amount
-        else:
-            round_position = RoundPositionEntry(amount)
-            self.round_positions[(round_id, position_id)] = round_position
+        # The liquidity joins the next round, like a new position's.
+        self.round_positions.add(self.next_round_id, position_id, amount)
 
         # Update the total collateral for the next round.
         self.rounds[self.next_round_id].total_collateral_at_initialization += amount
@@ -463,13 +822,11 @@ class Vault(IVault):
         Internal method to initialize and register a new round within the vault.
         """
 
-        # Define the start time for the new round. This could be 'now' or a specific start time if rounds are scheduled.
-        start_time = datetime.now()  # Or specific scheduling based on your application logic.
+        self.round_positions.open_round(new_round_id)
 
         # Create a new Round instance with the necessary parameters.
         new_round = Round(
             round_id=new_round_id,
-            # start_time=start_time,
             strike_price_strategy=self.strike_price_strategy,
             blockchain=self.blockchain,
             market_aggregator=self.market_aggregator,
@@ -479,6 +836,29 @@ class Vault(IVault):
         # Return the new round. Depending on your application's flow, you might return the round, its ID, or a status indicator.
         return new_round
     
+    def next_event_time(self) -> Optional[int]:
+        """
+        When the vault's next round transition becomes due: the auction's end, the options' expiry, or the end of
+        the settlement interval. None before the first round, which can start at any time.
+        """
+        if self.current_round_id is None:
+            return None
+        current_round = self.rounds[self.current_round_id]
+        if current_round.state == RoundState.AUCTION_STARTED:
+            return current_round.auction_end_time
+        if current_round.state == RoundState.AUCTION_SETTLED:
+            return current_round.option_settlement_time
+        return current_round.option_settlement_time + self.config.SETTLEMENT_INTERVAL
+
+    def advance_to_next_event(self) -> int:
+        """
+        Skip the blockchain clock straight to next_event_time, if it is still ahead.
+        """
+        due_time = self.next_event_time()
+        if due_time is not None and due_time > self.blockchain.get_current_time():
+            self.blockchain.advance_to(due_time)
+        return self.blockchain.get_current_time()
+
     def fetch_current_round(self):
         """
         Fetch the current round based on the current round ID.
@@ -488,7 +868,7 @@ class Vault(IVault):
         if self.current_round_id in self.rounds:
             return self.rounds[self.current_round_id]
         else:
-            raise ValueError("No active auction round found.")
+            raise VaultRejection("No active auction round found.")
 
     def fetch_next_round(self):
         """
@@ -499,7 +879,7 @@ class Vault(IVault):
         if self.next_round_id in self.rounds:
             return self.rounds[self.next_round_id]
         else:
-            raise ValueError("No active auction round found.")
+            raise VaultRejection("No active auction round found.")
 
     def auction_place_bid(self, bid_amount, bid_price):
         """
@@ -512,26 +892,35 @@ class Vault(IVault):
         current_round = self.fetch_current_round()
 
         if current_round.state != RoundState.AUCTION_STARTED:
-            raise ValueError("Can only place bids in a round where the auction has started.")
+            raise VaultRejection("Can only place bids in a round where the auction has started.")
 
         if bid_price < current_round.reserve_price:
-            raise ValueError("Your bid amount is below the reserve price.")
+            raise VaultRejection("Your bid amount is below the reserve price.")
 
         # Ensure the bid is placed before the auction end time
         current_time = self.blockchain.get_current_time()  # Or however you obtain the current time
         if current_time >= current_round.auction_end_time:
-            raise ValueError("The auction has ended. No more bids can be placed.")
+            raise VaultRejection("The auction has ended. No more bids can be placed.")
 
         bidder_id = self.blockchain.get_current_sender()
 
         # Place the bid (This could be adding the bid to a list of bids, or however your system accepts new bids)
         new_bid = {
+            'bid_id': self.bid_id,  # Monotonically increasing, so bids stay in arrival order
+            'timestamp': current_time,  # Arrival time
             'bidder_id': bidder_id,
             'size': bid_amount,  # Total amount in wei the user is willing to pay
             'price': bid_price,  # Price per option in wei the user is willing to pay
         }
         current_round.bids.append(new_bid)
-        print(f"Bid placed for bidder {bidder_id} with amount {bid_amount} and price {bid_price}.")
+        self.bid_id += 1
+
+        # Keep the indicative clearing price current for bidders.
+        if current_round.running_clearing_price is None:
+            current_round.running_clearing_price = RunningClearingPrice(current_round.total_options_forsale)
+        current_round.running_clearing_price.add_bid(bid_price, bid_amount)
+        print(f"Bid {new_bid['bid_id']} placed for bidder {bidder_id} with amount {bid_amount} and price {bid_price}.")
+        return new_bid['bid_id']
 
     def settle_auction(self):
         """
@@ -540,18 +929,18 @@ class Vault(IVault):
         current_round = self.fetch_current_round()
 
         if current_round.state != RoundState.AUCTION_STARTED:
-            raise ValueError("Can only settle an auction that has started.")
+            raise VaultRejection("Can only settle an auction that has started.")
 
         # Fetch the current time from the blockchain
         current_blockchain_time = self.blockchain.get_current_time()
 
         # Check if the auction settle time has been reached
         if current_blockchain_time < current_round.auction_end_time:
-            raise ValueError("Auction time has not expired yet.")
+            raise VaultRejection("Auction time has not expired yet.")
 
         # Validation to ensure auction can be settled
         if not current_round.bids:
-            raise ValueError("No bids in this auction round.")
+            raise VaultRejection("No bids in this auction round.")
 
         # sorted_bids = sorted(current_round.bids, key=lambda x: (-x['price'], x['size']))  # Assuming you want to sort by price then size
 
@@ -560,7 +949,7 @@ class Vault(IVault):
         print(f"Clearing price: {current_round.auction_clearing_price} ")
 
         if current_round.auction_clearing_price == 0:
-            raise ValueError("Auction could not clear any options. No sale occurred.")
+            raise VaultRejection("Auction could not clear any options. No sale occurred.")
 
         # Distribute options and handle transactions
         self._distribute_options_based_on_clearing_price(current_round )
@@ -601,10 +990,18 @@ class Vault(IVault):
         return clearing_price
     
     def _distribute_options_based_on_clearing_price(self, current_round: Round):
+        """
+        Allocate options in one pass over the bids in bid ID order, so ties at the clearing price go to the earliest bid.
+
+        Each bid's result is recorded in bid_options/bid_refunds, and the per-bidder totals in
+        option_allocations/refunds are summed as the pass goes, so a bidder with several bids keeps all of them.
+        """
         clearing_price = current_round.auction_clearing_price
         options_left = current_round.total_options_forsale
-        allocations = {}  # Temporary storage for option allocations
-        refunds = {}  # Temporary storage for refunds
+        allocations = {}  # Options per bidder, summed over their bids
+        refunds = {}  # Refunds in wei per bidder, summed over their bids
+        bid_options = []
+        bid_refunds = []
 
         print(f"\nDistributing options for round {current_round.round_id} with clearing price: {clearing_price}")
         print("Starting option distribution...\n")
@@ -612,26 +1009,35 @@ class Vault(IVault):
         for bid in current_round.bids:
             bidder_id = bid['bidder_id']
             if bid['price'] < clearing_price:
-                refunds[bidder_id] = bid['size']  # Full refund since no options were bought
-                print(f"Bidder {bidder_id} bid below the clearing price. A full refund of {bid['size']} will be issued.")
+                options_to_allocate = 0
+                refund_amount = bid['size']  # Full refund since no options were bought
+                print(f"Bid {bid['bid_id']} from {bidder_id} is below the clearing price. A full refund of {refund_amount} will be issued.")
             else:
-                # Calculate the number of options the bidder receives
+                # Calculate the number of options the bid receives
                 options_to_allocate = min(options_left, bid['size'] // clearing_price)
                 options_left -= options_to_allocate
 
                 if options_to_allocate > 0:
-                    allocations[bidder_id] = options_to_allocate
-                    print(f"Bidder {bidder_id} receives {options_to_allocate} options.")
+                    allocations[bidder_id] = allocations.get(bidder_id, 0) + options_to_allocate
+                    print(f"Bid {bid['bid_id']} from {bidder_id} receives {options_to_allocate} options.")
 
                 # Calculate if there's any amount to be refunded
                 refund_amount = bid['size'] - (options_to_allocate * clearing_price)
                 if refund_amount > 0:
-                    refunds[bidder_id] = refund_amount
-                    print(f"Bidder {bidder_id} will be refunded {refund_amount} due to overpayment.")
+                    print(f"Bid {bid['bid_id']} from {bidder_id} will be refunded {refund_amount} due to overpayment.")
+
+            if refund_amount > 0:
+                refunds[bidder_id] = refunds.get(bidder_id, 0) + refund_amount
+            bid_options.append(options_to_allocate)
+            bid_refunds.append(max(refund_amount, 0))
 
         # After processing all bids, update the round's records.
         current_round.option_allocations = allocations
         current_round.refunds = refunds
+        current_round.bid_options = bid_options
+        current_round.bid_refunds = bid_refunds
+        current_round.total_options_sold = current_round.total_options_forsale - options_left
+        current_round.total_premiums_collected = current_round.total_options_sold * clearing_price
 
         if options_left > 0:
             print(f"\n{options_left} options remain undistributed after the auction.")
@@ -650,7 +1056,11 @@ class Vault(IVault):
 
         # Ensure the round is not already settled.
         if current_round.state == RoundState.OPTION_SETTLED:
-            raise ValueError(f"Round {self.current_round_id} is already settled.")
+            raise VaultRejection(f"Round {self.current_round_id} is already settled.")
+
+        # Ensure the options have expired.
+        if self.blockchain.get_current_time() < current_round.option_settlement_time:
+            raise VaultRejection("Option round has not expired yet.")
 
         # Get the settlement price from the market aggregator and convert to gwei.
         settlement_price_wei = self.market_aggregator.get_current_month_avg_basefee()
@@ -669,10 +1079,10 @@ class Vault(IVault):
             payout_amount_wei = payout_amount_eth * 1e18  # Convert back to wei
             if payout_amount_wei > current_round.max_payout_per_option :
                 payout_amount_wei = current_round.max_payout_per_option
-                current_round.payout_amount_per_option = payout_amount_wei
+            current_round.payout_amount_per_option = payout_amount_wei
 
             # Calculate total payout required based on the options allocated.
-            total_options = sum(current_round.option_allocations.values())
+            total_options = current_round.total_options_sold or 0  # None if the auction never settled
             total_payout = total_options * payout_amount_wei
 
             print(f"Total options to settle: {total_options:.0f}")
@@ -690,6 +1100,7 @@ class Vault(IVault):
 
             print(f"Round {self.current_round_id} settled. Remaining collateral wei: {current_round.total_collateral_at_settlement:.0f} ")
         else:
+            current_round.total_collateral_at_settlement = current_round.total_collateral_at_initialization
             print(f"The settlement price is not greater than the strike price. No payout necessary for round {self.current_round_id}.")
 
         #print remaining collateral and payout
@@ -697,11 +1108,20 @@ class Vault(IVault):
         print(f"Total payout wei: {current_round.total_payout:.0f} ")
 
         # Mark the round as settled.
-        current_round.rouns_state = RoundState.OPTION_SETTLED
+        current_round.state = RoundState.OPTION_SETTLED
+
+        # Roll every position's share of the remaining collateral and of the premiums forward, dropping the
+        # round's entries.
+        rolled_total = self.round_positions.compact(
+            current_round.round_id,
+            current_round.total_collateral_at_initialization,
+            current_round.total_collateral_at_settlement,
+            current_round.total_premiums_collected,
+        )
 
-        # Prepare collateral for the next round by adding the remaining amount.
+        # Prepare collateral for the next round: the remaining collateral plus the premiums, relocked when it starts.
         next_round = self.fetch_next_round()
-        next_round.total_collateral_at_initialization += current_round.total_collateral_at_settlement
+        next_round.total_collateral_at_initialization += rolled_total
 
         print(f"Prepared {next_round.total_collateral_at_initialization:.0f} collateral for round {self.next_round_id}.")
 
@@ -710,6 +1130,10 @@ class Vault(IVault):
         if position_id not in self.liquidity_positions:
             print("Invalid position ID")
             return False
+
+        if amount <= 0:
+            print("Withdrawal amount must be positive.")
+            return False
         
         collateral_for_position_id = self.collateral_balance_of(position_id)
 
@@ -719,8 +1143,15 @@ class Vault(IVault):
             print(f"Insufficient collateral. Available: {collateral_for_position_id}, requested: {amount}")
             return False
 
-        self.round_positions[(round_id, position_id)] = RoundPositionEntry(collateral_for_position_id - amount)
-        self.liquidity_positions[position_id].round_id = round_id  # Update the round ID for the position
+        current_round = self.fetch_current_round()
+        if current_round.state != RoundState.OPTION_SETTLED:
+            # The collateral backs the current round's options until they settle.
+            print(f"Collateral is locked until round {self.current_round_id} settles.")
+            return False
+
+        # The settled balance has already been carried into the next round.
+        self.round_positions.add_rolled(position_id, -amount)
+        self.fetch_next_round().total_collateral_at_initialization -= amount
 
         print(f"Withdrew {amount} successfully.")
         return True
@@ -736,10 +1167,10 @@ class Vault(IVault):
 
     def refund_unused_bid_deposit(self, option_round_id: int, recipient: ContractAddress) -> int:
         if option_round_id < 0 or option_round_id >= self.next_round_id:
-            raise ValueError("Invalid option round ID")
+            raise VaultRejection("Invalid option round ID")
         round = self.rounds[option_round_id]
         if recipient not in round.refunds:
-            raise ValueError("Recipient has no unused bid deposit to refund")
+            raise VaultRejection("Recipient has no unused bid deposit to refund")
         refund_amount = round.refunds[recipient]
         round.refunds[recipient] = 0
         return refund_amount
@@ -747,9 +1178,9 @@ class Vault(IVault):
     def claim_option_payout(self, option_round_id: int, for_option_buyer: ContractAddress) -> int:
         round = self.rounds[option_round_id]
         if round.state != RoundState.OPTION_SETTLED:
-            raise ValueError("Option round has not been settled yet")
+            raise VaultRejection("Option round has not been settled yet")
         if for_option_buyer not in round.option_allocations:
-            raise ValueError("Option buyer has no option allocations in this round")
+            raise VaultRejection("Option buyer has no option allocations in this round")
         option_allocation = round.option_allocations[for_option_buyer]
         payout = round.payout_amount_per_option * option_allocation
 
@@ -758,6 +1189,87 @@ class Vault(IVault):
         round.option_allocations[for_option_buyer] = 0
         return payout
 
+    def _batch_round_status(self, option_round_id: int, settled_state: int) -> int:
+        if option_round_id not in self.rounds:
+            return ClaimStatus.INVALID_ROUND
+        if self.rounds[option_round_id].state < settled_state:
+            return ClaimStatus.ROUND_NOT_SETTLED
+        return ClaimStatus.OK
+
+    @staticmethod
+    def _batch_failures(option_round_id: int, recipients: Optional[List[ContractAddress]], status: int) -> List[BatchClaimEntry]:
+        # A whole-round request still gets one entry, so the failure is visible to the caller.
+        if recipients is None:
+            return [BatchClaimEntry(option_round_id, None, 0, status)]
+        return [BatchClaimEntry(option_round_id, recipient, 0, status) for recipient in recipients]
+
+    def batch_refund_unused_bid_deposits(self, requests: Dict[int, Optional[List[ContractAddress]]]) -> List[BatchClaimEntry]:
+        """
+        Refund unused bid deposits for many recipients across one or many rounds.
+
+        Unlike refund_unused_bid_deposit, failures are reported per entry instead of raised.
+
+        :param requests: Maps an option round ID to the recipients to refund, or to None to refund every bidder in that round.
+        :return: One BatchClaimEntry per requested (round, recipient) pair, in request order. A round requested with None
+                 that is invalid or whose auction has not settled yields a single entry with recipient None.
+        """
+        results = []
+        for option_round_id, recipients in requests.items():
+            status = self._batch_round_status(option_round_id, RoundState.AUCTION_SETTLED)
+            if status != ClaimStatus.OK:
+                results.extend(self._batch_failures(option_round_id, recipients, status))
+                continue
+            round = self.rounds[option_round_id]
+            refunds = round.refunds
+            if recipients is None:
+                # Single pass over every refund in the round.
+                for recipient, refund_amount in refunds.items():
+                    results.append(BatchClaimEntry(option_round_id, recipient, refund_amount, ClaimStatus.OK))
+                round.refunds = dict.fromkeys(refunds, 0)
+                continue
+            for recipient in recipients:
+                refund_amount = refunds.get(recipient)
+                if refund_amount is None:
+                    results.append(BatchClaimEntry(option_round_id, recipient, 0, ClaimStatus.NO_ENTRY))
+                    continue
+                refunds[recipient] = 0
+                results.append(BatchClaimEntry(option_round_id, recipient, refund_amount, ClaimStatus.OK))
+        return results
+
+    def batch_claim_option_payouts(self, requests: Dict[int, Optional[List[ContractAddress]]]) -> List[BatchClaimEntry]:
+        """
+        Claim option payouts for many option buyers across one or many settled rounds.
+
+        Unlike claim_option_payout, failures are reported per entry instead of raised.
+
+        :param requests: Maps an option round ID to the option buyers to pay, or to None to pay every option buyer in that round.
+        :return: One BatchClaimEntry per requested (round, option buyer) pair, in request order. A round requested with None
+                 that is invalid or not settled yields a single entry with recipient None.
+        """
+        results = []
+        for option_round_id, option_buyers in requests.items():
+            status = self._batch_round_status(option_round_id, RoundState.OPTION_SETTLED)
+            if status != ClaimStatus.OK:
+                results.extend(self._batch_failures(option_round_id, option_buyers, status))
+                continue
+            round = self.rounds[option_round_id]
+            allocations = round.option_allocations
+            payout_per_option = max(round.payout_amount_per_option, 0)
+            if option_buyers is None:
+                # Single pass over every allocation in the round.
+                for option_buyer, option_allocation in allocations.items():
+                    results.append(BatchClaimEntry(option_round_id, option_buyer, payout_per_option * option_allocation, ClaimStatus.OK))
+                round.option_allocations = dict.fromkeys(allocations, 0)
+                continue
+            for option_buyer in option_buyers:
+                option_allocation = allocations.get(option_buyer)
+                if option_allocation is None:
+                    results.append(BatchClaimEntry(option_round_id, option_buyer, 0, ClaimStatus.NO_ENTRY))
+                    continue
+                allocations[option_buyer] = 0
+                results.append(BatchClaimEntry(option_round_id, option_buyer, payout_per_option * option_allocation, ClaimStatus.OK))
+        return results
+
     def vault_type(self) -> VaultType:
         if self.strike_price_strategy == StrikePriceStrategy.OUT_OF_THE_MONEY:
             return VaultType.OUT_OF_THE_MONEY
@@ -777,7 +1289,7 @@ class Vault(IVault):
 
     def unused_bid_deposit_balance_of(self, option_round_id: int, option_buyer: ContractAddress) -> int:
         if option_round_id < 0 or option_round_id >= self.next_round_id:
-            raise ValueError("Invalid option round ID")
+            raise VaultRejection("Invalid option round ID")
         refunds = self.rounds[option_round_id].refunds
         if option_buyer not in refunds:
             return 0
@@ -785,7 +1297,7 @@ class Vault(IVault):
 
     def payout_balance_of(self, option_round_id:int, option_buyer: ContractAddress) -> int:
         if option_round_id < 0 or option_round_id >= self.next_round_id:
-            raise ValueError("Invalid option round ID")
+            raise VaultRejection("Invalid option round ID")
         allocations = self.rounds[option_round_id].option_allocations
         if option_buyer not in allocations:
             return 0
@@ -793,69 +1305,72 @@ class Vault(IVault):
 
     def option_balance_of(self,option_round_id:int , option_buyer: ContractAddress) -> int:
         if option_round_id < 0 or option_round_id >= self.next_round_id:
-            raise ValueError("Invalid option round ID")
+            raise VaultRejection("Invalid option round ID")
         allocations = self.rounds[option_round_id].option_allocations
         if option_buyer not in allocations:
             return 0
         return allocations[option_buyer]
 
+    # premiums earned over every settled round; they roll forward with the collateral and are withdrawn with it
     def premium_balance_of(self, lp_id: int) -> int:
-        raise NotImplementedError
+        if lp_id not in self.liquidity_positions:
+            raise VaultRejection("No liquidity position found with the provided ID.")
+        return self.round_positions.premium_balance(lp_id)
 
     # only return the amount which is collateralized
     def collateral_balance_of(self, lp_id: int) -> int:
-        start_round_id = self.liquidity_positions[lp_id].round_id
-        if start_round_id <= self.current_round_id:
-            if start_round_id == self.current_round_id:
-                return self.round_positions[(start_round_id, lp_id)].amount
-            else:
-                round_id = self.liquidity_positions[lp_id].round_id
-                collateral_for_position_id = 0
-                # Now, we process the rounds and calculate collateral for each round
-                while True:  # Nested loop to process each round until a non-settled round is reached
-                    if (round_id, lp_id) in self.round_positions:
-                        round_position_entry = self.round_positions[(round_id, lp_id)]
-                        collateral_for_position_id += round_position_entry.amount
-
-                    current_round = self.rounds[round_id]
-
-                    if current_round.state != RoundState.OPTION_SETTLED:
-                        # Skip the settled round
-                        break
-                    
-                    # Step 3 - Calculate the ratio
-                    total_collateral_initial = current_round.total_collateral_at_initialization
-                    ratio = collateral_for_position_id / total_collateral_initial
-
-                    # Step 4 - Calculate total collateral at settlement
-                    total_collateral_settlement = (
-                        total_collateral_initial - current_round.total_payout + current_round.total_premiums_collected
-                    )
-
-                    # Step 5 - Update the collateral position based on the settlement ratio
-                    collateral_for_position_id = ratio * total_collateral_settlement
-
-                    # Step 6 - Proceed to the next round if available
-                    round_id += 1  # Assuming round IDs are consecutive integers
-
-                    # Check if we've reached the end of the rounds for this position
-                    if (round_id == self.fetch_current_round().round_id and self.fetch_current_round().state == RoundState.INITIALIZED) or round_id == self.next_round_id :
-                        return collateral_for_position_id  
-
-        else:
-            return 0                   
+        if lp_id not in self.liquidity_positions:
+            raise VaultRejection("No liquidity position found with the provided ID.")
+        if self.current_round_id is None:
+            # No round has started, so nothing is collateralized yet.
+            return 0
+        if self.rounds[self.current_round_id].state == RoundState.OPTION_SETTLED:
+            # Settled rounds are compacted: the balance is the position's rolled-forward share.
+            return self.round_positions.rolled_balance(lp_id)
+        return self.round_positions.balance_entering(self.current_round_id, lp_id)
 
+    # liquidity not backing the current round: deposits waiting for the next round
     def unallocated_liquidity_balance_of(self, lp_id: int) -> int:
-        ...
+        if lp_id not in self.liquidity_positions:
+            raise VaultRejection("No liquidity position found with the provided ID.")
+        return self.round_positions.amount(self.next_round_id, lp_id)
 
     def total_collateral(self) -> int:
-        ...
+        if self.current_round_id is None:
+            return 0
+        if self.rounds[self.current_round_id].state == RoundState.OPTION_SETTLED:
+            return self.round_positions.rolled_total
+        return self.round_positions.rolled_total + self.round_positions.round_total(self.current_round_id)
 
     def total_unallocated_liquidity(self) -> int:
-        ...
+        return self.round_positions.round_total(self.next_round_id)
 
     def total_options_sold(self, option_round_id:int) -> int:
-        ...
+        return self.rounds[option_round_id].total_options_sold
+
+    def indicative_clearing_price(self, option_round_id: int) -> Tuple[int, int]:
+        """
+        The round's indicative clearing price and the options demanded at it, (0, 0) before the first bid.
+        """
+        if option_round_id not in self.rounds:
+            raise VaultRejection("Invalid option round ID")
+        running_clearing_price = self.rounds[option_round_id].running_clearing_price
+        if running_clearing_price is None:
+            return 0, 0
+        return running_clearing_price.price, running_clearing_price.options_covered
+
+    def bid_results(self, option_round_id: int):
+        """
+        Audit trail of a round's auction: yields (bid_id, timestamp, bidder_id, size, price, options_allocated, refund)
+        per bid in bid ID order. Results are 0 until the auction settles.
+        """
+        if option_round_id not in self.rounds:
+            raise VaultRejection("Invalid option round ID")
+        round = self.rounds[option_round_id]
+        settled = len(round.bid_options) == len(round.bids)
+        for index, bid in enumerate(round.bids):
+            yield (bid['bid_id'], bid['timestamp'], bid['bidder_id'], bid['size'], bid['price'],
+                   round.bid_options[index] if settled else 0, round.bid_refunds[index] if settled else 0)
 
 
     # Implement the other IVault methods...
@@ -863,89 +1378,92 @@ class Vault(IVault):
 
 # Usage
 
-market_aggregator = MarketAggregator()
-# set the prev month std dev and avg base fee in wei
-prev_month_std_dev = 4 * 1e9
-prev_month_avg_basefee = 20 * 1e9
-market_aggregator.set_prev_month_std_dev(prev_month_std_dev)  # Simulating previous month's standard deviation
-market_aggregator.set_prev_month_avg_basefee(prev_month_avg_basefee)  # Simulating average base fee
+if __name__ == "__main__":
+
+    market_aggregator = MarketAggregator()
+    # set the prev month std dev and avg base fee in wei
+    prev_month_std_dev = 4 * 1e9
+    prev_month_avg_basefee = 20 * 1e9
+    market_aggregator.set_prev_month_std_dev(prev_month_std_dev)  # Simulating previous month's standard deviation
+    market_aggregator.set_prev_month_avg_basefee(prev_month_avg_basefee)  # Simulating average base fee
 
-# create a blockchain instance
-blockchain = Blockchain()
+    # create a blockchain instance
+    blockchain = Blockchain()
 
-# Create strategies
-out_of_the_money_strategy = OutOfTheMoneyStrategy(market_aggregator)
+    # Create strategies
+    out_of_the_money_strategy = OutOfTheMoneyStrategy(market_aggregator)
 
-# create a vault instance with the blockchain
-vault = Vault(out_of_the_money_strategy, blockchain, market_aggregator)
+    # create a vault instance with the blockchain
+    vault = Vault(out_of_the_money_strategy, blockchain, market_aggregator)
 
-# Simulate a new transaction by setting the sender and time
-blockchain.set_current_sender("0x123abc")
-blockchain.set_current_time(datetime.utcnow())
+    # Simulate a new transaction by setting the sender and time
+    blockchain.set_current_sender("0x123abc")
+    blockchain.advance_by(60)
 
-new_position_id_1 = vault.open_liquidity_position( int(100) * 10**18)
-print(f"Opened new liquidity position with ID: {new_position_id_1}")    
+    new_position_id_1 = vault.open_liquidity_position( int(100) * 10**18)
+    print(f"Opened new liquidity position with ID: {new_position_id_1}")    
 
 
-#simulate another transaction with a different sender and time
+    #simulate another transaction with a different sender and time
 
-blockchain.set_current_sender("0x456def")
-blockchain.set_current_time(datetime.utcnow())
+    blockchain.set_current_sender("0x456def")
+    blockchain.advance_by(60)
 
-new_position_id_2 = vault.open_liquidity_position( int(200) * 10**18)
-print(f"Opened new liquidity position with ID: {new_position_id_2}")
+    new_position_id_2 = vault.open_liquidity_position( int(200) * 10**18)
+    print(f"Opened new liquidity position with ID: {new_position_id_2}")
 
 
-blockchain.set_current_sender("0x456d11")
-blockchain.set_current_time(datetime.utcnow())
+    blockchain.set_current_sender("0x456d11")
+    blockchain.advance_by(60)
 
-new_position_id_2 = vault.open_liquidity_position( int(300) * 10**18)
-print(f"Opened new liquidity position with ID: {new_position_id_2}")
+    new_position_id_2 = vault.open_liquidity_position( int(300) * 10**18)
+    print(f"Opened new liquidity position with ID: {new_position_id_2}")
 
-# start a new option round
-round_id, option_round_params = vault.start_new_option_round()
-#print all the option_round_params
-print(f"Started new option round with ID: {round_id}")
-print(f"Current average basefee: {option_round_params.current_average_basefee:.0f}") 
-print(f"Standard deviation: {option_round_params.standard_deviation:.0f}")
-print(f"Strike price: {option_round_params.strike_price:.0f}")
-print(f"Cap level: {option_round_params.cap_level:.0f}")
-print(f"Collateral level: {option_round_params.collateral_level:.0f}")
-print(f"Max payout per option: {option_round_params.max_payout_per_option:.0f}")
-print(f"Reserve price: {option_round_params.reserve_price:.0f}")
-print(f"Total options for sale: {option_round_params.total_options_forsale}")
-print(f"Option expiry time: {option_round_params.option_expiry_time}")
-print(f"Auction end time: {option_round_params.auction_end_time}")
-print(f"Minimum bid amount: {option_round_params.minimum_bid_amount}")
-print(f"Minimum collateral required: {option_round_params.minimum_collateral_required:.0f}")
-print(f"Total collateral in the round: {option_round_params.total_collateral:.0f}")
+    # start a new option round
+    round_id, option_round_params = vault.start_new_option_round()
+    #print all the option_round_params
+    print(f"Started new option round with ID: {round_id}")
+    print(f"Current average basefee: {option_round_params.current_average_basefee:.0f}") 
+    print(f"Standard deviation: {option_round_params.standard_deviation:.0f}")
+    print(f"Strike price: {option_round_params.strike_price:.0f}")
+    print(f"Cap level: {option_round_params.cap_level:.0f}")
+    print(f"Collateral level: {option_round_params.collateral_level:.0f}")
+    print(f"Max payout per option: {option_round_params.max_payout_per_option:.0f}")
+    print(f"Reserve price: {option_round_params.reserve_price:.0f}")
+    print(f"Total options for sale: {option_round_params.total_options_forsale}")
+    print(f"Option expiry time: {option_round_params.option_expiry_time}")
+    print(f"Auction end time: {option_round_params.auction_end_time}")
+    print(f"Minimum bid amount: {option_round_params.minimum_bid_amount}")
+    print(f"Minimum collateral required: {option_round_params.minimum_collateral_required:.0f}")
+    print(f"Total collateral in the round: {option_round_params.total_collateral:.0f}")
 
 
-blockchain.set_current_sender("0x456d22")
+    blockchain.set_current_sender("0x456d22")
 
-# place a bid where size is in wei and price si in wei per option
-size = 10 * 10 ** vault.decimals()
-price = 10 * 10 ** vault.decimals()
-vault.auction_place_bid( size , price)
+    # place a bid where size is in wei and price si in wei per option
+    size = 10 * 10 ** vault.decimals()
+    price = 10 * 10 ** vault.decimals()
+    vault.auction_place_bid( size , price)
 
-# place another bid
-blockchain.set_current_sender("0x456d23")
+    # place another bid
+    blockchain.set_current_sender("0x456d23")
 
-size = 20 * 10 ** vault.decimals()
-price = 20 * 10 ** vault.decimals()
-vault.auction_place_bid( size , price)
+    size = 20 * 10 ** vault.decimals()
+    price = 20 * 10 ** vault.decimals()
+    vault.auction_place_bid( size , price)
 
-# place another bid
-blockchain.set_current_sender("0x456d25")
+    # place another bid
+    blockchain.set_current_sender("0x456d25")
 
-size = 30 * 10 ** vault.decimals()
-price = 30 * 10 ** vault.decimals()
-vault.auction_place_bid( size , price)
+    size = 30 * 10 ** vault.decimals()
+    price = 30 * 10 ** vault.decimals()
+    vault.auction_place_bid( size , price)
 
-blockchain.set_current_time(option_round_params.auction_end_time + timedelta(days=1))
-vault.settle_auction()
+    blockchain.advance_to(option_round_params.auction_end_time + SECONDS_PER_DAY)
+    vault.settle_auction()
 
-market_aggregator.set_current_month_avg_basefee(30 * 1e9)  # Simulating current month's average base fee
-vault.settle_option_round()
+    blockchain.advance_to(option_round_params.option_expiry_time)
+    market_aggregator.set_current_month_avg_basefee(30 * 1e9)  # Simulating current month's average base fee
+    vault.settle_option_round()
 
-vault.withdraw_liquidity(0,100000000000000000000000 )
\ No newline at end of file
+    vault.withdraw_liquidity(0,100000000000000000000000 )
@@ -0,0 +1,187 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from pitch_lake_reference import GENESIS_TIME, Blockchain, MarketAggregator, StrikePriceStrategy, Vault, VaultConfig
+
+
+class PortfolioMarketFeed(MarketAggregator):
+    """
+    A MarketAggregator that is not a process-wide singleton, so each portfolio owns its own feed.
+    """
+
+    def __new__(cls):
+        instance = object.__new__(cls)
+        instance.prev_month_std_dev = 0
+        instance.prev_month_avg_basefee = 0
+        instance.current_month_avg_basefee = 0
+        return instance
+
+    def load_window(self, window: "MarketWindow"):
+        self.prev_month_std_dev = window.prev_month_std_dev
+        self.prev_month_avg_basefee = window.prev_month_avg_basefee
+        self.current_month_avg_basefee = window.current_month_avg_basefee
+
+
+class PortfolioBlockchain(Blockchain):
+    """
+    A Blockchain that is not a process-wide singleton, so each portfolio owns its own clock and sender.
+    """
+
+    def __new__(cls):
+        instance = object.__new__(cls)
+        instance.current_time = GENESIS_TIME
+        instance.current_sender = None
+        return instance
+
+
+class MarketWindow:
+    def __init__(self, prev_month_avg_basefee: int, prev_month_std_dev: int, current_month_avg_basefee: int):
+        self.prev_month_avg_basefee = prev_month_avg_basefee  # in wei
+        self.prev_month_std_dev = prev_month_std_dev  # in wei
+        self.current_month_avg_basefee = current_month_avg_basefee  # in wei, the settlement price
+
+
+class MarketTimeline:
+    """
+    Market inputs for consecutive rounds, computed once and shared by every vault in a portfolio.
+    """
+
+    def __init__(self, windows: List[MarketWindow]):
+        self.windows = windows
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __getitem__(self, index: int) -> MarketWindow:
+        return self.windows[index]
+
+    @classmethod
+    def from_basefees(cls, basefees: Sequence[int], window_size: int) -> "MarketTimeline":
+        """
+        Build one window per round from a raw basefee series (in wei).
+
+        The series is cut into blocks of `window_size` samples. Round i is priced from block i's
+        mean and standard deviation and settles at block i + 1's mean, so n blocks give n - 1 rounds.
+        """
+        samples = np.asarray(basefees, dtype=np.float64)
+        num_blocks = len(samples) // window_size
+        if num_blocks < 2:
+            raise ValueError("Need at least two full windows of basefees.")
+        blocks = samples[:num_blocks * window_size].reshape(num_blocks, window_size)
+        means = blocks.mean(axis=1)
+        std_devs = blocks.std(axis=1)
+        return cls([
+            MarketWindow(int(means[i]), int(std_devs[i]), int(means[i + 1]))
+            for i in range(num_blocks - 1)
+        ])
+
+
+class VaultRoundReport:
+    def __init__(self, round_id: int, options_sold, clearing_price, max_payout_per_option, total_collateral, total_payout):
+        self.round_id = round_id
+        self.options_sold = options_sold
+        self.clearing_price = clearing_price
+        self.premiums = options_sold * clearing_price
+        self.exposure = options_sold * max_payout_per_option  # worst-case payout for the options sold
+        self.total_collateral = total_collateral
+        self.total_payout = total_payout
+
+
+class PortfolioRoundReport:
+    def __init__(self, window_index: int, vaults: Dict[str, VaultRoundReport]):
+        self.window_index = window_index
+        self.vaults = vaults
+        self.total_collateral = sum(report.total_collateral for report in vaults.values())
+        self.total_exposure = sum(report.exposure for report in vaults.values())
+        self.total_premiums = sum(report.premiums for report in vaults.values())
+        self.total_payout = sum(report.total_payout for report in vaults.values())
+
+
+# Called once per vault per round while its auction is open: (vault name, vault, round ID).
+BidProvider = Callable[[str, Vault, int], None]
+
+
+class PortfolioEngine:
+    """
+    Runs N vaults (e.g. ITM, ATM and OTM) side by side against one shared MarketTimeline.
+
+    The portfolio owns a single market feed and clock. Each round, the feed is loaded with the
+    round's window once and every vault reads from it, so no vault recomputes or re-fetches market
+    data, and nothing touches the process-wide MarketAggregator or Blockchain singletons.
+    """
+
+    def __init__(self, timeline: MarketTimeline, start_time: int, config: Optional[VaultConfig] = None):
+        self.timeline = timeline
+        self.config = config if config else VaultConfig()
+        self.market_feed = PortfolioMarketFeed()
+        self.blockchain = PortfolioBlockchain()
+        self.blockchain.set_current_time(start_time)
+        self.vaults: Dict[str, Vault] = {}
+        self.reports: List[PortfolioRoundReport] = []
+        self._next_window = 0
+
+    def add_vault(self, name: str, strategy_cls: Type[StrikePriceStrategy], deposits: List[Tuple[str, int]]) -> Vault:
+        """
+        Add a vault using `strategy_cls` and open one liquidity position per (depositor, amount).
+        """
+        if name in self.vaults:
+            raise ValueError(f"Vault {name} already exists.")
+        vault = Vault(strategy_cls(self.market_feed), self.blockchain, self.market_feed, self.config)
+        for depositor, amount in deposits:
+            self.blockchain.set_current_sender(depositor)
+            vault.open_liquidity_position(amount)
+        self.vaults[name] = vault
+        return vault
+
+    def run_round(self, bid_provider: BidProvider) -> PortfolioRoundReport:
+        """
+        Run the next window's round on every vault and aggregate the results.
+        """
+        if self._next_window >= len(self.timeline):
+            raise ValueError("Market timeline exhausted.")
+        window_index = self._next_window
+        self.market_feed.load_window(self.timeline[window_index])
+
+        round_start = self.blockchain.get_current_time()
+        opened = {}
+        for name, vault in self.vaults.items():
+            self.blockchain.set_current_time(round_start)
+            round_id, _ = vault.start_new_option_round()
+            bid_provider(name, vault, round_id)
+            opened[name] = round_id
+
+        self.blockchain.set_current_time(round_start + self.config.AUCTION_DURATION)
+        for name, vault in self.vaults.items():
+            # An auction nobody bid in sells nothing; its round settles with no options outstanding.
+            if vault.rounds[opened[name]].bids:
+                vault.settle_auction()
+
+        self.blockchain.set_current_time(round_start + self.config.ROUND_DURATION)
+        reports = {}
+        for name, vault in self.vaults.items():
+            vault.settle_option_round()
+            round = vault.rounds[opened[name]]
+            reports[name] = VaultRoundReport(
+                round_id=round.round_id,
+                options_sold=round.total_options_sold or 0,
+                clearing_price=round.auction_clearing_price or 0,
+                max_payout_per_option=round.max_payout_per_option,
+                total_collateral=round.total_collateral_at_initialization,
+                total_payout=round.total_payout,
+            )
+
+        self.blockchain.set_current_time(round_start + self.config.ROUND_DURATION + self.config.SETTLEMENT_INTERVAL)
+        self._next_window += 1
+        report = PortfolioRoundReport(window_index, reports)
+        self.reports.append(report)
+        return report
+
+    def run(self, bid_provider: BidProvider, num_rounds: Optional[int] = None) -> List[PortfolioRoundReport]:
+        """
+        Run `num_rounds` rounds, or until the timeline is exhausted.
+        """
+        remaining = len(self.timeline) - self._next_window
+        for _ in range(remaining if num_rounds is None else min(num_rounds, remaining)):
+            self.run_round(bid_provider)
+        return self.reports
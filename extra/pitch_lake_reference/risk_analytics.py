@@ -0,0 +1,154 @@
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from pitch_lake_reference import StrikePriceStrategy, Vault, derive_round_parameters
+
+DEFAULT_SCENARIOS = 10**6
+DEFAULT_CONFIDENCE_LEVELS = (0.95, 0.99)
+
+
+class RiskReport:
+    def __init__(self, num_scenarios: int, total_collateral, options_sold, expected_payout, value_at_risk: Dict[float, float],
+                 expected_shortfall: Dict[float, float], probability_in_the_money: float, probability_capped: float,
+                 probability_insufficient_collateral: float):
+        self.num_scenarios = num_scenarios
+        self.total_collateral = total_collateral  # total_collateral_at_initialization, in wei
+        self.options_sold = options_sold
+        self.expected_payout = expected_payout  # in wei
+        self.value_at_risk = value_at_risk  # confidence level -> payout quantile, in wei
+        self.expected_shortfall = expected_shortfall  # confidence level -> mean payout beyond the VaR, in wei
+        self.probability_in_the_money = probability_in_the_money
+        self.probability_capped = probability_capped
+        self.probability_insufficient_collateral = probability_insufficient_collateral  # settle_option_round would raise
+
+    def summary(self) -> str:
+        lines = [
+            f"Scenarios: {self.num_scenarios}",
+            f"Options sold: {self.options_sold}",
+            f"Total collateral wei: {self.total_collateral:.0f}",
+            f"Expected payout wei: {self.expected_payout:.0f} ({self.expected_payout / self.total_collateral:.2%} of collateral)"
+            if self.total_collateral else f"Expected payout wei: {self.expected_payout:.0f}",
+        ]
+        for level in sorted(self.value_at_risk):
+            lines.append(f"VaR {level:.1%}: {self.value_at_risk[level]:.0f}  ES {level:.1%}: {self.expected_shortfall[level]:.0f}")
+        lines.append(f"P(in the money): {self.probability_in_the_money:.4f}")
+        lines.append(f"P(payout capped): {self.probability_capped:.4f}")
+        lines.append(f"P(not enough collateral): {self.probability_insufficient_collateral:.6f}")
+        return "\n".join(lines)
+
+
+def simulate_settlement_basefees(avg_basefee, std_dev, num_scenarios: int = DEFAULT_SCENARIOS, seed: Optional[int] = None,
+                                 distribution: str = "lognormal") -> np.ndarray:
+    """
+    Draw settlement basefees (in wei) around the previous month's average and standard deviation.
+
+    "lognormal" matches the mean and standard deviation while keeping basefees positive;
+    "normal" draws from the normal distribution directly, clipped at zero.
+    """
+    rng = np.random.default_rng(seed)
+    if avg_basefee <= 0:
+        raise ValueError("The average basefee must be positive.")
+    if distribution == "lognormal":
+        sigma_squared = math.log1p((std_dev / avg_basefee) ** 2)
+        mu = math.log(avg_basefee) - sigma_squared / 2
+        return rng.lognormal(mu, math.sqrt(sigma_squared), size=num_scenarios)
+    if distribution == "normal":
+        return np.maximum(rng.normal(avg_basefee, std_dev, size=num_scenarios), 0.0)
+    raise ValueError(f"Unknown distribution {distribution}.")
+
+
+def payout_per_option(settlement_basefees: np.ndarray, strike_price, max_payout_per_option) -> np.ndarray:
+    """
+    Vectorized payout per option in wei, computed the way settle_option_round does:
+    1 ETH per Gwei above the strike, capped at max_payout_per_option.
+    """
+    payouts = (settlement_basefees / 1e9 - strike_price / 1e9) * 1e18
+    return np.clip(payouts, 0.0, max_payout_per_option)
+
+
+def payout_risk(settlement_basefees: np.ndarray, strike_price, max_payout_per_option, options_sold, total_collateral,
+                confidence_levels: Sequence[float] = DEFAULT_CONFIDENCE_LEVELS) -> RiskReport:
+    """
+    Risk of a round's total payout over the given settlement scenarios.
+    """
+    per_option = payout_per_option(settlement_basefees, strike_price, max_payout_per_option)
+    total_payouts = per_option * options_sold
+    num_scenarios = len(total_payouts)
+
+    value_at_risk = {}
+    expected_shortfall = {}
+    if num_scenarios:
+        quantiles = np.quantile(total_payouts, confidence_levels)
+        for level, quantile in zip(confidence_levels, quantiles):
+            tail = total_payouts[total_payouts >= quantile]
+            value_at_risk[level] = float(quantile)
+            expected_shortfall[level] = float(tail.mean()) if len(tail) else float(quantile)
+
+    return RiskReport(
+        num_scenarios=num_scenarios,
+        total_collateral=total_collateral,
+        options_sold=options_sold,
+        expected_payout=float(total_payouts.mean()) if num_scenarios else 0.0,
+        value_at_risk=value_at_risk,
+        expected_shortfall=expected_shortfall,
+        probability_in_the_money=float(np.count_nonzero(per_option > 0)) / num_scenarios if num_scenarios else 0.0,
+        probability_capped=float(np.count_nonzero(per_option >= max_payout_per_option)) / num_scenarios if num_scenarios else 0.0,
+        probability_insufficient_collateral=float(np.count_nonzero(total_payouts > total_collateral)) / num_scenarios if num_scenarios else 0.0,
+    )
+
+
+def analyze_next_round(vault: Vault, num_scenarios: int = DEFAULT_SCENARIOS, seed: Optional[int] = None,
+                       options_sold=None, distribution: str = "lognormal",
+                       confidence_levels: Sequence[float] = DEFAULT_CONFIDENCE_LEVELS) -> RiskReport:
+    """
+    Payout risk of the vault's next round, before start_new_option_round is called.
+
+    The round's parameters are derived from the current market window exactly as start_new_option_round
+    will derive them, without going through the vault's parameter cache so its statistics stay untouched.
+    Unless `options_sold` is given, every option for sale is assumed sold (the worst case).
+    """
+    market_aggregator = vault.market_aggregator
+    prev_month_avg_basefee = market_aggregator.get_prev_month_avg_basefee()
+    prev_month_std_dev = market_aggregator.get_prev_month_std_dev()
+    total_collateral = vault.fetch_next_round().total_collateral_at_initialization
+    strategy = vault.strike_price_strategy
+    if type(strategy).strike_price is StrikePriceStrategy.strike_price:
+        strike_price = strategy.calculate()  # strategies that only override calculate(), as in RoundParameterCache
+    else:
+        strike_price = strategy.strike_price(prev_month_avg_basefee, prev_month_std_dev)
+    params = derive_round_parameters(strike_price, prev_month_avg_basefee, prev_month_std_dev, total_collateral)
+
+    basefees = simulate_settlement_basefees(prev_month_avg_basefee, prev_month_std_dev, num_scenarios, seed, distribution)
+    return payout_risk(
+        basefees,
+        params.strike_price,
+        params.max_payout_per_option,
+        params.total_options_forsale if options_sold is None else options_sold,
+        total_collateral,
+        confidence_levels,
+    )
+
+
+def analyze_current_round(vault: Vault, num_scenarios: int = DEFAULT_SCENARIOS, seed: Optional[int] = None,
+                          distribution: str = "lognormal",
+                          confidence_levels: Sequence[float] = DEFAULT_CONFIDENCE_LEVELS) -> RiskReport:
+    """
+    Payout risk of the running round, using the options it actually sold once its auction has settled.
+
+    Scenarios are drawn around the previous-month basefee average and standard deviation the round was
+    priced from, recorded in its parameters when it started, so they match analyze_next_round and later
+    market feed updates do not change the analysis.
+    """
+    round = vault.fetch_current_round()
+    params = round.option_round_params
+    if params is None:
+        raise ValueError("The current round has not started.")
+    if params.prev_month_avg_basefee is None:
+        raise ValueError("The current round's parameters do not record the market window it was priced from.")
+    options_sold = round.total_options_sold if round.total_options_sold is not None else round.total_options_forsale
+    basefees = simulate_settlement_basefees(params.prev_month_avg_basefee, params.standard_deviation,
+                                            num_scenarios, seed, distribution)
+    return payout_risk(basefees, round.strike_price, round.max_payout_per_option, options_sold,
+                       round.total_collateral_at_initialization, confidence_levels)
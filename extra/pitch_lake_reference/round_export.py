@@ -0,0 +1,143 @@
+import math
+import os
+from typing import Dict, List, Tuple
+
+from columnar import DEFAULT_CHUNK_ROWS, ColumnarReader, ColumnarWriter
+from pitch_lake_reference import Vault
+
+# Round history as columnar files (see columnar.py), one table per file, for analytics.
+# Amounts are exported as float64 for analysis; vault_checkpoint.py keeps them exact.
+
+MAGIC = b"PLCOL\x00\x00\x01"
+FORMAT_VERSION = 2
+
+ROUND_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("state", "int"),
+    ("strike_price", "float"),
+    ("cap_level", "float"),
+    ("collateral_level", "float"),
+    ("max_payout_per_option", "float"),
+    ("reserve_price", "float"),
+    ("total_options_forsale", "float"),
+    ("auction_clearing_price", "float"),
+    ("settlement_price", "float"),
+    ("payout_amount_per_option", "float"),
+    ("total_collateral_at_initialization", "float"),
+    ("total_collateral_at_settlement", "float"),
+    ("total_payout", "float"),
+    ("total_premiums_collected", "float"),
+    ("num_bids", "int"),
+    ("num_option_buyers", "int"),
+    ("auction_start_time", "int"),
+    ("auction_end_time", "int"),
+    ("option_settlement_time", "int"),
+]
+
+BID_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("bid_id", "int"),
+    ("timestamp", "int"),
+    ("bidder_id", "str"),
+    ("size", "float"),
+    ("price", "float"),
+    ("options_allocated", "float"),
+    ("refund", "float"),
+]
+
+LP_POSITION_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("position_id", "int"),
+    ("depositor", "str"),
+    ("amount", "float"),
+]
+
+
+def _to_float(value) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _to_epoch(value) -> int:
+    """
+    Round timestamps are integer seconds on the blockchain clock; -1 if unset.
+    """
+    return -1 if value is None else int(value)
+
+
+def open_export(path: str) -> ColumnarReader:
+    """
+    Open one exported table file. Its columns are read with reader.column(name).
+    """
+    return ColumnarReader(path, MAGIC, FORMAT_VERSION, "columnar round export")
+
+
+def _write_table(path: str, table_name: str, schema: List[Tuple[str, str]], rows, chunk_rows: int):
+    with ColumnarWriter(path, MAGIC, FORMAT_VERSION) as writer:
+        table = writer.add_table(table_name, schema, chunk_rows)
+        for row in rows:
+            table.append(row)
+
+
+def _round_row(round) -> tuple:
+    return (
+        round.round_id,
+        round.state,
+        _to_float(round.strike_price),
+        _to_float(round.cap_level),
+        _to_float(round.collateral_level),
+        _to_float(round.max_payout_per_option),
+        _to_float(round.reserve_price),
+        _to_float(round.total_options_forsale),
+        _to_float(round.auction_clearing_price),
+        _to_float(round.settlement_price),
+        _to_float(round.payout_amount_per_option),
+        _to_float(round.total_collateral_at_initialization),
+        _to_float(round.total_collateral_at_settlement),
+        _to_float(round.total_payout),
+        _to_float(round.total_premiums_collected),
+        len(round.bids),
+        len(round.option_allocations),
+        _to_epoch(round.auction_start_time),
+        _to_epoch(round.auction_end_time),
+        _to_epoch(round.option_settlement_time),
+    )
+
+
+def export_round_history(vault: Vault, directory: str, include_bids: bool = False, include_lp_positions: bool = False,
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, str]:
+    """
+    Write the vault's full round history to `directory` as columnar files.
+
+    :param vault: The vault whose rounds are exported.
+    :param directory: Output directory, created if missing.
+    :param include_bids: Also write one row per bid, in bid ID order, with the bid's allocation and refund.
+    :param include_lp_positions: Also write one row per (round, liquidity position) balance. Settled rounds are
+                                 compacted, so their balances appear once, against the last settled round.
+    :param chunk_rows: Number of rows buffered in memory before a chunk is flushed to disk.
+    :return: A mapping of table name to the written file path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {"rounds": os.path.join(directory, "rounds.plcol")}
+    round_ids = sorted(vault.rounds)
+
+    _write_table(paths["rounds"], "rounds", ROUND_SCHEMA, (_round_row(vault.rounds[round_id]) for round_id in round_ids), chunk_rows)
+
+    if include_bids:
+        paths["bids"] = os.path.join(directory, "bids.plcol")
+        bid_rows = (
+            (round_id, bid_id, _to_epoch(timestamp), bidder_id, size, price, options_allocated, refund)
+            for round_id in round_ids
+            for bid_id, timestamp, bidder_id, size, price, options_allocated, refund in vault.bid_results(round_id)
+        )
+        _write_table(paths["bids"], "bids", BID_SCHEMA, bid_rows, chunk_rows)
+
+    if include_lp_positions:
+        paths["lp_positions"] = os.path.join(directory, "lp_positions.plcol")
+        positions = vault.liquidity_positions
+        position_rows = (
+            (round_id, position_id, positions[position_id].depositor if position_id in positions else None, amount)
+            for round_id, position_id, amount in vault.round_positions.iter_entries()
+        )
+        _write_table(paths["lp_positions"], "lp_positions", LP_POSITION_SCHEMA, position_rows, chunk_rows)
+
+    return paths
@@ -0,0 +1,132 @@
+import heapq
+import itertools
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pitch_lake_reference import Blockchain, Vault
+
+
+class Transition:
+    START_ROUND = "start_new_option_round"
+    SETTLE_AUCTION = "settle_auction"
+    SETTLE_OPTION_ROUND = "settle_option_round"
+
+
+# The round state machine: each transition is followed by this one, due at the vault's next_event_time().
+NEXT_TRANSITION = {
+    Transition.START_ROUND: Transition.SETTLE_AUCTION,
+    Transition.SETTLE_AUCTION: Transition.SETTLE_OPTION_ROUND,
+    Transition.SETTLE_OPTION_ROUND: Transition.START_ROUND,
+}
+
+
+class ScheduledTransition:
+    def __init__(self, due_time: int, vault_id: int, transition: str):
+        self.due_time = due_time
+        self.vault_id = vault_id
+        self.transition = transition
+
+
+TransitionHook = Callable[[Vault, ScheduledTransition], None]
+
+
+class RoundScheduler:
+    """
+    Keeper loop that drives many vaults through their round state machine in simulated time.
+
+    Every vault has exactly one pending transition in a priority queue ordered by due time. The
+    scheduler jumps the blockchain clock straight to the earliest due transition and fires it, then
+    queues that vault's next transition (NEXT_TRANSITION) at the vault's next_event_time():
+
+        start_new_option_round -> settle_auction        at auction_end_time
+        settle_auction         -> settle_option_round   at option_settlement_time (skipped if the auction got no bids)
+        settle_option_round    -> start_new_option_round at option_settlement_time + SETTLEMENT_INTERVAL
+
+    The clock is shared, so it is advanced by the queue rather than by each vault's advance_to_next_event(),
+    which single-vault drivers use instead.
+    """
+
+    def __init__(self, blockchain: Blockchain,
+                 before_transition: Optional[TransitionHook] = None,
+                 after_transition: Optional[TransitionHook] = None,
+                 on_error: Optional[Callable[[Vault, ScheduledTransition, Exception], None]] = None):
+        """
+        :param blockchain: The blockchain whose clock is advanced. It is shared by every scheduled vault.
+        :param before_transition: Called with the clock already at the due time, e.g. to place bids or set market data.
+        :param after_transition: Called after a transition succeeded.
+        :param on_error: If set, a failing transition is reported here and its vault is no longer scheduled.
+                         Otherwise the exception propagates.
+        """
+        self.blockchain = blockchain
+        self.before_transition = before_transition
+        self.after_transition = after_transition
+        self.on_error = on_error
+        self.vaults: Dict[int, Vault] = {}
+        self.transitions_fired = 0
+        self._queue: List[Tuple[int, int, ScheduledTransition]] = []
+        self._sequence = itertools.count()  # keeps same-time transitions in FIFO order
+
+    def _schedule(self, due_time: int, vault_id: int, transition: str):
+        heapq.heappush(self._queue, (due_time, next(self._sequence), ScheduledTransition(due_time, vault_id, transition)))
+
+    def add_vault(self, vault: Vault, start_time: Optional[int] = None) -> int:
+        """
+        Register a vault whose first round starts at `start_time` (defaults to the current blockchain time).
+
+        :return: The vault's ID within the scheduler.
+        """
+        vault_id = len(self.vaults)
+        self.vaults[vault_id] = vault
+        self._schedule(start_time if start_time is not None else self.blockchain.get_current_time(), vault_id, Transition.START_ROUND)
+        return vault_id
+
+    def next_due_time(self) -> Optional[int]:
+        return self._queue[0][0] if self._queue else None
+
+    def step(self) -> Optional[ScheduledTransition]:
+        """
+        Advance the clock to the earliest due transition and fire it.
+
+        :return: The fired transition, or None if nothing is scheduled.
+        """
+        if not self._queue:
+            return None
+        _, _, scheduled = heapq.heappop(self._queue)
+        vault = self.vaults[scheduled.vault_id]
+
+        if scheduled.due_time > self.blockchain.get_current_time():
+            self.blockchain.advance_to(scheduled.due_time)
+        try:
+            if self.before_transition:
+                self.before_transition(vault, scheduled)
+            current_round = vault.fetch_current_round() if scheduled.transition == Transition.SETTLE_AUCTION else None
+            if current_round is not None and not current_round.bids:
+                # An auction nobody bid in sells nothing: there is nothing to settle, and the round runs to
+                # expiry with no options outstanding, as in the load generator and the portfolio engine.
+                due_time = current_round.option_settlement_time
+            else:
+                getattr(vault, scheduled.transition)()
+                due_time = vault.next_event_time()
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(vault, scheduled, e)
+            return scheduled
+
+        self.transitions_fired += 1
+        if self.after_transition:
+            self.after_transition(vault, scheduled)
+        self._schedule(due_time, scheduled.vault_id, NEXT_TRANSITION[scheduled.transition])
+        return scheduled
+
+    def run_until(self, end_time: int) -> int:
+        """
+        Fire every transition due at or before `end_time`, in due-time order.
+
+        :return: The number of transitions fired.
+        """
+        fired_before = self.transitions_fired
+        while self._queue and self._queue[0][0] <= end_time:
+            self.step()
+        if self.blockchain.get_current_time() < end_time:
+            self.blockchain.advance_to(end_time)
+        return self.transitions_fired - fired_before
@@ -0,0 +1,310 @@
+import csv
+import heapq
+import os
+import struct
+import tempfile
+from typing import Iterable, Iterator, List, Tuple
+
+from pitch_lake_reference import Round, RoundState, Vault, VaultRejection
+
+# Bid files hold one bid per record in arrival order, the same order `Round.bids` would have.
+#
+#   "csv": header `bidder_id,size,price`, sizes and prices as decimal wei
+#   "bin": fixed-width little-endian records of BID_RECORD
+#          (bidder_id uint64, size uint128, price uint128; uint128 stored as low, high uint64)
+#
+# Settlement writes one result per bid, in the same order and format:
+#
+#   "csv": header `bid_index,bidder_id,options_allocated,refund`
+#   "bin": RESULT_RECORD (bid_index uint64, bidder_id uint64, options_allocated uint64, refund uint128)
+
+BID_RECORD = struct.Struct("<QQQQQ")
+RESULT_RECORD = struct.Struct("<QQQQQ")
+_PRICE_SIZE_RECORD = struct.Struct("<QQQQ")  # price uint128, size uint128, used for sorted runs
+_PRICE_RECORD = struct.Struct("<QQ")  # distinct prices, descending
+
+DEFAULT_CHUNK_SIZE = 1_000_000  # records held in memory at once while sorting
+DEFAULT_MERGE_FAN_IN = 64  # sorted runs open at once while merging
+_READ_RECORDS = 65536
+_MASK64 = (1 << 64) - 1
+
+Bid = Tuple[object, int, int]  # (bidder_id, size in wei, price per option in wei)
+
+
+def _split(value: int) -> Tuple[int, int]:
+    return value & _MASK64, value >> 64
+
+
+def _iter_records(path: str, record: struct.Struct) -> Iterator[tuple]:
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(record.size * _READ_RECORDS)
+            if not block:
+                return
+            if len(block) % record.size:
+                raise ValueError(f"{path} is truncated.")
+            yield from record.iter_unpack(block)
+
+
+def write_bids(path: str, bids: Iterable[Bid], fmt: str = "bin"):
+    """
+    Write bids to a bid file. Binary files require integer bidder IDs.
+    """
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["bidder_id", "size", "price"])
+            for bidder_id, size, price in bids:
+                writer.writerow([bidder_id, int(size), int(price)])
+    elif fmt == "bin":
+        with open(path, "wb") as f:
+            buffer = bytearray()
+            for bidder_id, size, price in bids:
+                buffer += BID_RECORD.pack(bidder_id, *_split(int(size)), *_split(int(price)))
+                if len(buffer) >= BID_RECORD.size * _READ_RECORDS:
+                    f.write(buffer)
+                    buffer.clear()
+            f.write(buffer)
+    else:
+        raise ValueError(f"Unknown bid file format {fmt}.")
+
+
+def iter_bids(path: str, fmt: str = "bin") -> Iterator[Bid]:
+    """
+    Stream (bidder_id, size, price) tuples from a bid file in arrival order.
+    """
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for bidder_id, size, price in reader:
+                yield bidder_id, int(size), int(price)
+    elif fmt == "bin":
+        for bidder_id, size_lo, size_hi, price_lo, price_hi in _iter_records(path, BID_RECORD):
+            yield bidder_id, size_lo | (size_hi << 64), price_lo | (price_hi << 64)
+    else:
+        raise ValueError(f"Unknown bid file format {fmt}.")
+
+
+class _ExternalBidSort:
+    """
+    Sorts the valid bids of a bid file by price, highest first, using on-disk runs of `chunk_size` records.
+
+    Produces a sorted (price, size) file and a file of distinct prices, both in descending price order.
+    Runs are merged at most `fan_in` at a time, in as many passes as needed, so the number of open
+    files stays bounded however many runs the bid file produces.
+    """
+
+    def __init__(self, workdir: str, chunk_size: int, fan_in: int = DEFAULT_MERGE_FAN_IN):
+        if fan_in < 2:
+            raise ValueError("The merge fan-in must be at least 2.")
+        self.workdir = workdir
+        self.chunk_size = chunk_size
+        self.fan_in = fan_in
+        self._runs_written = 0
+        self.sorted_path = os.path.join(workdir, "sorted.bin")
+        self.prices_path = os.path.join(workdir, "prices.bin")
+        self.num_prices = 0
+
+    def _next_run_path(self) -> str:
+        path = os.path.join(self.workdir, f"run{self._runs_written}.bin")
+        self._runs_written += 1
+        return path
+
+    def _write_run(self, run: List[Tuple[int, int]]) -> str:
+        run.sort(key=lambda bid: -bid[0])
+        path = self._next_run_path()
+        with open(path, "wb") as f:
+            f.write(b"".join(_PRICE_SIZE_RECORD.pack(*_split(price), *_split(size)) for price, size in run))
+        return path
+
+    def _merged(self, run_paths: List[str]) -> Iterator[Tuple[int, int]]:
+        return heapq.merge(*(self._iter_run(path) for path in run_paths), key=lambda bid: -bid[0])
+
+    def _merge_pass(self, run_paths: List[str]) -> List[str]:
+        """
+        Merge every group of `fan_in` runs into one longer run.
+        """
+        merged_paths = []
+        for start in range(0, len(run_paths), self.fan_in):
+            group = run_paths[start:start + self.fan_in]
+            if len(group) == 1:
+                merged_paths.append(group[0])
+                continue
+            path = self._next_run_path()
+            with open(path, "wb", buffering=_PRICE_SIZE_RECORD.size * _READ_RECORDS) as f:
+                for price, size in self._merged(group):
+                    f.write(_PRICE_SIZE_RECORD.pack(*_split(price), *_split(size)))
+            for group_path in group:
+                os.remove(group_path)
+            merged_paths.append(path)
+        return merged_paths
+
+    @staticmethod
+    def _iter_run(path: str) -> Iterator[Tuple[int, int]]:
+        for price_lo, price_hi, size_lo, size_hi in _iter_records(path, _PRICE_SIZE_RECORD):
+            yield price_lo | (price_hi << 64), size_lo | (size_hi << 64)
+
+    def sort(self, bids: Iterable[Bid], reserve_price):
+        run_paths = []
+        run: List[Tuple[int, int]] = []
+        for _, size, price in bids:
+            if price < reserve_price:
+                continue
+            run.append((price, size))
+            if len(run) >= self.chunk_size:
+                run_paths.append(self._write_run(run))
+                run = []
+        if run:
+            run_paths.append(self._write_run(run))
+
+        while len(run_paths) > self.fan_in:
+            run_paths = self._merge_pass(run_paths)
+
+        merged = self._merged(run_paths)
+        last_price = None
+        with open(self.sorted_path, "wb") as sorted_file, open(self.prices_path, "wb") as prices_file:
+            for price, size in merged:
+                sorted_file.write(_PRICE_SIZE_RECORD.pack(*_split(price), *_split(size)))
+                if price != last_price:
+                    prices_file.write(_PRICE_RECORD.pack(*_split(price)))
+                    self.num_prices += 1
+                    last_price = price
+        for path in run_paths:
+            os.remove(path)
+
+    def price_at(self, index: int) -> int:
+        with open(self.prices_path, "rb") as f:
+            f.seek(index * _PRICE_RECORD.size)
+            price_lo, price_hi = _PRICE_RECORD.unpack(f.read(_PRICE_RECORD.size))
+        return price_lo | (price_hi << 64)
+
+    def demand_at(self, price: int, total_options) -> int:
+        """
+        Units demanded at `price`, summed the way `_calculate_clearing_price` does, stopping once supply is covered.
+        """
+        total_units = 0
+        for bid_price, size in self._iter_run(self.sorted_path):
+            if bid_price < price:
+                break
+            total_units += min(size // price, total_options)
+            if total_units >= total_options:
+                break
+        return total_units
+
+
+def calculate_clearing_price_streaming(bid_path: str, fmt: str, reserve_price, total_options,
+                                       chunk_size: int = DEFAULT_CHUNK_SIZE, workdir: str = None,
+                                       fan_in: int = DEFAULT_MERGE_FAN_IN) -> int:
+    """
+    Compute the same clearing price as `Vault._calculate_clearing_price` for a bid file, in bounded memory.
+
+    Demand only falls as the price rises, so the clearing price is found by binary search over the
+    distinct bid prices, with one streaming pass over the sorted bids per probe.
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        bid_sort = _ExternalBidSort(tmp, chunk_size, fan_in)
+        bid_sort.sort(iter_bids(bid_path, fmt), reserve_price)
+        if bid_sort.num_prices == 0:
+            return 0
+
+        low, high = 0, bid_sort.num_prices  # first index (highest price first) whose demand covers supply
+        while low < high:
+            mid = (low + high) // 2
+            if bid_sort.demand_at(bid_sort.price_at(mid), total_options) >= total_options:
+                high = mid
+            else:
+                low = mid + 1
+
+        # If demand never covers supply, use the price of the lowest valid bid.
+        return bid_sort.price_at(min(low, bid_sort.num_prices - 1))
+
+
+def distribute_options_streaming(bid_path: str, fmt: str, result_path: str, clearing_price, total_options) -> Tuple[int, int]:
+    """
+    Second pass: allocate options and refunds per bid in arrival order, writing one result per bid.
+
+    :return: (options sold, total refunded in wei).
+    """
+    options_left = total_options
+    total_refunded = 0
+
+    if fmt == "csv":
+        out = open(result_path, "w", newline="")
+        writer = csv.writer(out)
+        writer.writerow(["bid_index", "bidder_id", "options_allocated", "refund"])
+        write = writer.writerow
+    elif fmt == "bin":
+        out = open(result_path, "wb", buffering=RESULT_RECORD.size * _READ_RECORDS)
+        write = None
+    else:
+        raise ValueError(f"Unknown bid file format {fmt}.")
+
+    with out:
+        for bid_index, (bidder_id, size, price) in enumerate(iter_bids(bid_path, fmt)):
+            if price < clearing_price:
+                options_to_allocate = 0
+                refund_amount = size
+            else:
+                options_to_allocate = min(options_left, size // clearing_price)
+                options_left -= options_to_allocate
+                refund_amount = size - options_to_allocate * clearing_price
+            total_refunded += refund_amount
+            if write is not None:
+                write([bid_index, bidder_id, int(options_to_allocate), int(refund_amount)])
+            else:
+                out.write(RESULT_RECORD.pack(bid_index, bidder_id, int(options_to_allocate), *_split(int(refund_amount))))
+
+    return total_options - options_left, total_refunded
+
+
+def iter_results(path: str, fmt: str = "bin") -> Iterator[Tuple[int, object, int, int]]:
+    """
+    Stream (bid_index, bidder_id, options_allocated, refund) tuples from a settlement result file.
+    """
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for bid_index, bidder_id, options_allocated, refund in reader:
+                yield int(bid_index), bidder_id, int(options_allocated), int(refund)
+    elif fmt == "bin":
+        for bid_index, bidder_id, options_allocated, refund_lo, refund_hi in _iter_records(path, RESULT_RECORD):
+            yield bid_index, bidder_id, options_allocated, refund_lo | (refund_hi << 64)
+    else:
+        raise ValueError(f"Unknown bid file format {fmt}.")
+
+
+def settle_auction_from_file(vault: Vault, bid_path: str, result_path: str, fmt: str = "bin",
+                             chunk_size: int = DEFAULT_CHUNK_SIZE, workdir: str = None,
+                             fan_in: int = DEFAULT_MERGE_FAN_IN) -> int:
+    """
+    Settle the current round's auction from a bid file instead of `Round.bids`.
+
+    Per-bid allocations and refunds go to `result_path`; the round keeps only its totals, so
+    `option_allocations` and `refunds` stay empty and memory does not grow with the bid count.
+
+    :return: The clearing price in wei.
+    """
+    current_round: Round = vault.fetch_current_round()
+
+    if current_round.state != RoundState.AUCTION_STARTED:
+        raise VaultRejection("Can only settle an auction that has started.")
+
+    if vault.blockchain.get_current_time() < current_round.auction_end_time:
+        raise VaultRejection("Auction time has not expired yet.")
+
+    total_options = current_round.total_options_forsale
+    clearing_price = calculate_clearing_price_streaming(bid_path, fmt, current_round.reserve_price, total_options, chunk_size, workdir,
+                                                        fan_in)
+    if clearing_price == 0:
+        raise VaultRejection("Auction could not clear any options. No sale occurred.")
+
+    options_sold, _ = distribute_options_streaming(bid_path, fmt, result_path, clearing_price, total_options)
+
+    current_round.auction_clearing_price = clearing_price
+    current_round.total_options_sold = options_sold
+    current_round.total_premiums_collected = options_sold * clearing_price
+    current_round.state = RoundState.AUCTION_SETTLED
+    print(f"Auction settled from {bid_path}. Clearing price: {clearing_price}, options sold: {options_sold}.")
+    return clearing_price
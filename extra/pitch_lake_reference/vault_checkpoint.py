@@ -0,0 +1,312 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from columnar import ColumnarReader, ColumnarWriter
+from pitch_lake_reference import (Blockchain, LiquidityPosition, MarketAggregator, OptionRoundParams, Round, RoundPositionStore,
+                                  RoundState, RunningClearingPrice, StrikePriceStrategy, Vault, VaultConfig)
+
+# Versioned binary checkpoint of a Vault's full state, loaded through mmap. The file is a columnar
+# container (see columnar.py) with one table per kind of record, and the vault scalars and config in its footer.
+#
+# Column types:
+#   "int" -> IDs, states, counts, timestamps (seconds on the simulated clock, -1 if unset)
+#   "num" -> wei amounts and option counts, exactly as the model holds them: ints stay ints up to 128 bits,
+#            floats keep their float64 bits
+#   "str" -> account IDs, which restore as strings
+#
+# Opening a checkpoint only parses the footer. Columns are memoryviews over the mapping until restore()
+# turns them into a Vault.
+
+MAGIC = b"PLCKP\x00\x00\x01"
+FORMAT_VERSION = 5
+
+ROUND_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("state", "int"),
+    ("strike_price", "num"),
+    ("cap_level", "num"),
+    ("collateral_level", "num"),
+    ("max_payout_per_option", "num"),
+    ("reserve_price", "num"),
+    ("total_options_forsale", "num"),
+    ("total_options_sold", "num"),
+    ("auction_clearing_price", "num"),
+    ("settlement_price", "num"),
+    ("payout_amount_per_option", "num"),
+    ("total_collateral_at_initialization", "num"),
+    ("total_collateral_at_settlement", "num"),
+    ("total_payout", "num"),
+    ("total_premiums_collected", "num"),
+    ("round_start_time", "int"),
+    ("auction_start_time", "int"),
+    ("auction_end_time", "int"),
+    ("option_settlement_time", "int"),
+    # OptionRoundParams, present once the round has started.
+    ("has_params", "int"),
+    ("params_current_average_basefee", "num"),
+    ("params_standard_deviation", "num"),
+    ("params_strike_price", "num"),
+    ("params_cap_level", "num"),
+    ("params_collateral_level", "num"),
+    ("params_max_payout_per_option", "num"),
+    ("params_reserve_price", "num"),
+    ("params_total_options_forsale", "num"),
+    ("params_option_expiry_time", "int"),
+    ("params_auction_end_time", "int"),
+    ("params_minimum_bid_amount", "num"),
+    ("params_minimum_collateral_required", "num"),
+    ("params_total_collateral", "num"),
+    ("params_prev_month_avg_basefee", "num"),
+]
+
+_ROUND_AMOUNTS = [name for name, _ in ROUND_SCHEMA[2:16]]
+_ROUND_TIMES = ["round_start_time", "auction_start_time", "auction_end_time", "option_settlement_time"]
+_PARAMS_FIELDS = ["current_average_basefee", "standard_deviation", "strike_price", "cap_level", "collateral_level",
+                  "max_payout_per_option", "reserve_price", "total_options_forsale", "option_expiry_time", "auction_end_time",
+                  "minimum_bid_amount", "minimum_collateral_required", "total_collateral", "prev_month_avg_basefee"]
+_PARAMS_TIMES = ["option_expiry_time", "auction_end_time"]
+
+BID_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("bid_id", "int"),
+    ("timestamp", "int"),
+    ("bidder_id", "str"),
+    ("size", "num"),
+    ("price", "num"),
+    ("settled", "int"),  # whether options_allocated and refund hold the distribution's results
+    ("options_allocated", "num"),
+    ("refund", "num"),
+]
+
+# Shared by option_allocations and refunds.
+CLAIM_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("account", "str"),
+    ("amount", "num"),
+]
+
+POSITION_SCHEMA: List[Tuple[str, str]] = [
+    ("position_id", "int"),
+    ("depositor", "str"),
+    ("round_id", "int"),
+]
+
+# Non-zero (round, position) amounts of rounds not yet compacted.
+ROUND_POSITION_SCHEMA: List[Tuple[str, str]] = [
+    ("round_id", "int"),
+    ("position_id", "int"),
+    ("amount", "num"),
+]
+
+# Dense per-position columns of the RoundPositionStore, indexed by position ID.
+ROLLED_SCHEMA: List[Tuple[str, str]] = [
+    ("rolled_balance", "num"),
+    ("premium_balance", "num"),
+]
+
+
+def _to_timestamp(value) -> int:
+    return -1 if value is None else int(value)
+
+
+def _from_timestamp(value: int) -> Optional[int]:
+    return None if value < 0 else value
+
+
+def _round_row(round: Round) -> tuple:
+    params = round.option_round_params
+    row = [
+        round.round_id,
+        round.state,
+    ]
+    row.extend(getattr(round, name) for name in _ROUND_AMOUNTS)
+    row.extend(_to_timestamp(getattr(round, name)) for name in _ROUND_TIMES)
+    row.append(1 if params is not None else 0)
+    for name in _PARAMS_FIELDS:
+        value = getattr(params, name) if params is not None else None
+        row.append(_to_timestamp(value) if name in _PARAMS_TIMES else value)
+    return tuple(row)
+
+
+def write_checkpoint(vault: Vault, path: str):
+    """
+    Write the vault's full state to `path`.
+
+    The blockchain, market aggregator and strategy instance are not part of the checkpoint; only the
+    strategy's class name is recorded, and they are supplied again on restore.
+    """
+    store = vault.round_positions
+    round_ids = sorted(vault.rounds)
+
+    with ColumnarWriter(path, MAGIC, FORMAT_VERSION) as writer:
+        rounds = writer.add_table("rounds", ROUND_SCHEMA)
+        bids = writer.add_table("bids", BID_SCHEMA)
+        option_allocations = writer.add_table("option_allocations", CLAIM_SCHEMA)
+        refunds = writer.add_table("refunds", CLAIM_SCHEMA)
+        positions = writer.add_table("positions", POSITION_SCHEMA)
+        round_positions = writer.add_table("round_positions", ROUND_POSITION_SCHEMA)
+        rolled = writer.add_table("rolled", ROLLED_SCHEMA)
+
+        for round_id in round_ids:
+            round = vault.rounds[round_id]
+            rounds.append(_round_row(round))
+            settled = len(round.bid_options) == len(round.bids) > 0
+            for bid_id, timestamp, bidder_id, size, price, options_allocated, refund in vault.bid_results(round_id):
+                bids.append((round_id, bid_id, _to_timestamp(timestamp), bidder_id, size, price, int(settled), options_allocated, refund))
+            for account, amount in round.option_allocations.items():
+                option_allocations.append((round_id, account, amount))
+            for account, amount in round.refunds.items():
+                refunds.append((round_id, account, amount))
+        for position_id, position in vault.liquidity_positions.items():
+            positions.append((position_id, position.depositor, position.round_id))
+        for round_id in sorted(store.rounds):
+            for position_id, amount in enumerate(store.rounds[round_id]):
+                if amount:
+                    round_positions.append((round_id, position_id, amount))
+        for position_id in range(max(len(store.rolled_balances), len(store.premium_balances))):
+            rolled.append((store.rolled_balance(position_id), store.premium_balance(position_id)))
+
+        config = vault.config
+        writer.metadata["vault"] = {
+            "strategy": type(vault.strike_price_strategy).__name__,
+            "position_id": vault.position_id,
+            "bid_id": vault.bid_id,
+            "current_round_id": vault.current_round_id,
+            "next_round_id": vault.next_round_id,
+            "open_rounds": sorted(store.rounds),
+            "compacted_through": store.compacted_through,
+            "rolled_total": store.rolled_total,
+            "premium_total": store.premium_total,
+        }
+        writer.metadata["config"] = {
+            "ROUND_DURATION": config.ROUND_DURATION,
+            "AUCTION_DURATION": config.AUCTION_DURATION,
+            "SETTLEMENT_INTERVAL": config.SETTLEMENT_INTERVAL,
+            "MIN_BID_AMOUNT": config.MIN_BID_AMOUNT,
+            "MIN_DEPOSIT_AMOUNT": config.MIN_DEPOSIT_AMOUNT,
+            "MIN_COLLATERAL": config.MIN_COLLATERAL,
+        }
+
+
+class VaultCheckpoint:
+    """
+    A checkpoint opened through mmap. Opening reads only the footer; `iter_chunks` returns memoryviews over
+    the mapping without copying, and `restore` builds a live Vault.
+
+    Release any views you hold before calling close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reader = ColumnarReader(path, MAGIC, FORMAT_VERSION, "vault checkpoint")
+        self.vault_state: Dict = self._reader.metadata["vault"]
+        self.config: Dict = self._reader.metadata["config"]
+
+    def num_rows(self, table: str) -> int:
+        return self._reader.num_rows(table)
+
+    def iter_chunks(self, table: str, columns: Optional[List[str]] = None) -> Iterator[Dict[str, memoryview]]:
+        """
+        Zero-copy views of a table, one {column name: memoryview} mapping per chunk. String columns are their
+        int32 dictionary codes (see `dictionary`), and "num" columns three uint64 words per value.
+        """
+        return self._reader.iter_chunks(columns, table)
+
+    def dictionary(self, table: str, name: str) -> List[str]:
+        return self._reader.dictionary(name, table)
+
+    def column(self, table: str, name: str) -> list:
+        return self._reader.column(name, table)
+
+    def restore_config(self) -> VaultConfig:
+        config = VaultConfig()
+        for name in ("ROUND_DURATION", "AUCTION_DURATION", "SETTLEMENT_INTERVAL", "MIN_BID_AMOUNT", "MIN_DEPOSIT_AMOUNT", "MIN_COLLATERAL"):
+            setattr(config, name, self.config[name])
+        return config
+
+    def restore(self, blockchain: Blockchain, market_aggregator: MarketAggregator,
+                strike_price_strategy: Optional[StrikePriceStrategy] = None) -> Vault:
+        """
+        Rebuild the Vault. Unless a strategy is given, the recorded strategy class is instantiated over `market_aggregator`.
+        """
+        state = self.vault_state
+        if strike_price_strategy is None:
+            strategies = {cls.__name__: cls for cls in StrikePriceStrategy.__subclasses__()}
+            if state["strategy"] not in strategies:
+                raise ValueError(f"Unknown strike price strategy {state['strategy']}; pass one explicitly.")
+            strike_price_strategy = strategies[state["strategy"]](market_aggregator)
+        config = self.restore_config()
+
+        vault = Vault(strike_price_strategy, blockchain, market_aggregator, config)
+        vault.position_id = state["position_id"]
+        vault.bid_id = state["bid_id"]
+        vault.current_round_id = state["current_round_id"]
+        vault.next_round_id = state["next_round_id"]
+        vault.rounds = {}
+
+        round_names = [name for name, _ in ROUND_SCHEMA]
+        for row in self._reader.rows("rounds"):
+            values = dict(zip(round_names, row))
+            round = Round(strike_price_strategy, blockchain, market_aggregator, values["round_id"], config)
+            round.state = values["state"]
+            for name in _ROUND_AMOUNTS:
+                setattr(round, name, values[name])
+            for name in _ROUND_TIMES:
+                setattr(round, name, _from_timestamp(values[name]))
+            if values["has_params"]:
+                round.option_round_params = OptionRoundParams(**{
+                    name: _from_timestamp(values["params_" + name]) if name in _PARAMS_TIMES else values["params_" + name]
+                    for name in _PARAMS_FIELDS
+                })
+            vault.rounds[round.round_id] = round
+
+        rounds = vault.rounds
+        for round_id, bid_id, timestamp, bidder_id, size, price, settled, options_allocated, refund in self._reader.rows("bids"):
+            round = rounds[round_id]
+            round.bids.append({'bid_id': bid_id, 'timestamp': _from_timestamp(timestamp), 'bidder_id': bidder_id, 'size': size, 'price': price})
+            if settled:
+                round.bid_options.append(options_allocated)
+                round.bid_refunds.append(refund)
+        for round_id, account, amount in self._reader.rows("option_allocations"):
+            rounds[round_id].option_allocations[account] = amount
+        for round_id, account, amount in self._reader.rows("refunds"):
+            rounds[round_id].refunds[account] = amount
+
+        # The indicative clearing price is derived state; replay the bids of an open auction to rebuild it.
+        for round in rounds.values():
+            if round.state == RoundState.AUCTION_STARTED and round.bids:
+                round.running_clearing_price = RunningClearingPrice(round.total_options_forsale)
+                for bid in round.bids:
+                    round.running_clearing_price.add_bid(bid['price'], bid['size'])
+
+        vault.liquidity_positions = {
+            position_id: LiquidityPosition(position_id, depositor, round_id)
+            for position_id, depositor, round_id in self._reader.rows("positions")
+        }
+
+        store = RoundPositionStore()
+        for round_id in state["open_rounds"]:
+            store.open_round(round_id)
+        for round_id, position_id, amount in self._reader.rows("round_positions"):
+            store.add(round_id, position_id, amount)
+        store.rolled_balances = self.column("rolled", "rolled_balance")
+        store.premium_balances = self.column("rolled", "premium_balance")
+        store.rolled_total = state["rolled_total"]
+        store.premium_total = state["premium_total"]
+        store.compacted_through = state["compacted_through"]
+        vault.round_positions = store
+        return vault
+
+    def close(self):
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_checkpoint(path: str, blockchain: Blockchain, market_aggregator: MarketAggregator,
+                    strike_price_strategy: Optional[StrikePriceStrategy] = None) -> Vault:
+    with VaultCheckpoint(path) as checkpoint:
+        return checkpoint.restore(blockchain, market_aggregator, strike_price_strategy)
@@ -0,0 +1,196 @@
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Vault methods instrumented by default. Each is wrapped on the vault instance only while
+# profiling is enabled, so a vault that was never profiled runs the original methods untouched.
+PROFILED_METHODS = [
+    "auction_place_bid",
+    "settle_auction",
+    "_calculate_clearing_price",
+    "_distribute_options_based_on_clearing_price",
+    "settle_option_round",
+    "collateral_balance_of",
+    "withdraw_liquidity",
+    "start_new_option_round",
+]
+
+
+_MISSING = object()
+
+
+def install_wrappers(vault, names: List[str], wrap: Callable) -> Dict[str, Tuple[object, object]]:
+    """
+    Replace each named method on the vault instance with `wrap(name, current method)`. The current method may
+    already be another tool's wrapper, so wrappers stack.
+
+    :return: name -> (replaced instance attribute, installed wrapper), for remove_wrappers.
+    """
+    installed = {}
+    for name in names:
+        wrapper = wrap(name, getattr(vault, name))
+        installed[name] = (vault.__dict__.get(name, _MISSING), wrapper)
+        setattr(vault, name, wrapper)
+    return installed
+
+
+def remove_wrappers(vault, installed: Dict[str, Tuple[object, object]]):
+    """
+    Put back what install_wrappers replaced, so wrappers installed earlier by another tool stay in place.
+    Wrappers stacked on top later have to be removed first.
+    """
+    stacked = [name for name, (_, wrapper) in installed.items() if vault.__dict__.get(name) is not wrapper]
+    if stacked:
+        raise ValueError(f"Other wrappers were installed over {', '.join(stacked)}; remove them first.")
+    for name, (previous, _) in installed.items():
+        if previous is _MISSING:
+            del vault.__dict__[name]
+        else:
+            vault.__dict__[name] = previous
+
+
+class LatencyHistogram:
+    """
+    Log2-bucketed latency histogram in nanoseconds. Bucket i holds samples in [2**(i-1), 2**i).
+    """
+
+    NUM_BUCKETS = 64
+
+    def __init__(self):
+        self.buckets = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int):
+        self.buckets[min(elapsed_ns.bit_length(), self.NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, q: float) -> int:
+        """
+        Upper bound of the bucket containing the q-th percentile (0 < q <= 100), in nanoseconds.
+        """
+        if self.count == 0:
+            return 0
+        target = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(1 << i, self.max_ns)
+        return self.max_ns
+
+    def mean(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+
+class VaultProfiler:
+    """
+    Opt-in per-method call counts, latency histograms and work counters for a Vault.
+
+    Usage:
+        profiler = VaultProfiler(vault)
+        profiler.enable()
+        ... run the simulation ...
+        profiler.disable()
+        print(profiler.summary())
+        profiler.dump_folded("vault.folded")  # feed to flamegraph.pl
+    """
+
+    def __init__(self, vault, methods: Optional[List[str]] = None):
+        self.vault = vault
+        self.methods = methods if methods is not None else PROFILED_METHODS
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.folded_ns: Dict[str, int] = defaultdict(int)  # "vault;outer;inner" -> self time in ns
+        self._stack: List[str] = ["vault"]
+        self._child_ns: List[int] = []
+        self._installed: Dict[str, Tuple[object, object]] = {}
+        self.enabled = False
+
+    def enable(self):
+        if self.enabled:
+            return
+        self._installed = install_wrappers(self.vault, self.methods, self._wrap)
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        remove_wrappers(self.vault, self._installed)
+        self._installed = {}
+        self.enabled = False
+
+    def reset(self):
+        # Histograms are zeroed in place because enabled wrappers hold references to them.
+        for histogram in self.histograms.values():
+            histogram.__init__()
+        self.counters.clear()
+        self.folded_ns.clear()
+
+    def _measure_work(self, name: str, args: tuple) -> Optional[Tuple[str, int]]:
+        """
+        The work counter `name` adds to and by how much, measured before the call since settlement drops the
+        round it compacts. The caller adds it only once the call has succeeded.
+        """
+        if name in ("_calculate_clearing_price", "_distribute_options_based_on_clearing_price"):
+            return "bids_scanned", len(args[0].bids)
+        if name == "settle_option_round":
+            # Settlement folds the round's column and the rolled balances into one column of the longer length.
+            round_positions = self.vault.round_positions
+            round_column = round_positions.rounds.get(self.vault.current_round_id, [])
+            return "positions_compacted", max(len(round_column), len(round_positions.rolled_balances))
+        return None
+
+    def _wrap(self, name: str, method):
+        histogram = self.histograms[name]
+        counters = self.counters
+        stack = self._stack
+        child_ns = self._child_ns
+
+        def profiled(*args, **kwargs):
+            counters[name + ".calls"] += 1
+            work = self._measure_work(name, args)
+            stack.append(name)
+            child_ns.append(0)
+            start = time.perf_counter_ns()
+            try:
+                result = method(*args, **kwargs)
+                if work is not None:
+                    counters[work[0]] += work[1]
+                return result
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                self.folded_ns[";".join(stack)] += elapsed - child_ns.pop()
+                stack.pop()
+                if child_ns:
+                    child_ns[-1] += elapsed
+                histogram.record(elapsed)
+
+        profiled.__wrapped__ = method
+        return profiled
+
+    def summary(self) -> str:
+        lines = [f"{'method':<46}{'calls':>10}{'total ms':>12}{'mean us':>12}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total_ns):
+            if histogram.count == 0:
+                continue
+            lines.append(
+                f"{name:<46}{histogram.count:>10}{histogram.total_ns / 1e6:>12.3f}{histogram.mean() / 1e3:>12.2f}"
+                f"{histogram.percentile(50) / 1e3:>10.1f}{histogram.percentile(99) / 1e3:>10.1f}{histogram.max_ns / 1e3:>10.1f}"
+            )
+        for counter in ("bids_scanned", "positions_compacted"):
+            lines.append(f"{counter}: {self.counters.get(counter, 0)}")
+        return "\n".join(lines)
+
+    def dump_folded(self, path: str):
+        """
+        Write self time per call stack in the collapsed-stack format read by flamegraph.pl
+        (use --countname=ns).
+        """
+        with open(path, "w") as f:
+            for stack, elapsed_ns in sorted(self.folded_ns.items()):
+                f.write(f"{stack} {elapsed_ns}\n")